@@ -14,8 +14,33 @@ from sqlite3 import (
     ProgrammingError
 )
 from .connection import connect, Connection
-from .pool import create_pool, Pool
+from .pool import (
+    create_pool,
+    Pool,
+    PoolOverloadedError,
+    PoolQuotaExceededError
+)
 from .cursor import Cursor
+from .sizing import AdaptivePoolSizer
+from .batch import WriteBatcher, WriteResult
+from .coalesce import ReadCoalescer
+from .loader import Loader, table_loader
+from .counter import CounterBuffer
+from .fingerprint import fingerprint
+from .slowlog import SlowQueryLog, SlowQuery
+from .stats import StatementStats, StatementStat
+from .prometheus import PrometheusCollector
+from .leak import LeakDetector
+from .blocking import (
+    BlockingDetector,
+    set_blocking_threshold,
+    get_blocking_detector
+)
+from .limiter import (
+    ExecutorLimiter,
+    set_executor_limit,
+    get_executor_limiter
+)
 
 
 __version__ = "0.3.1"
@@ -24,7 +49,29 @@ __all__ = [
     "Connection",
     "create_pool",
     "Pool",
+    "PoolOverloadedError",
+    "PoolQuotaExceededError",
     "Cursor",
+    "AdaptivePoolSizer",
+    "WriteBatcher",
+    "WriteResult",
+    "ReadCoalescer",
+    "Loader",
+    "table_loader",
+    "CounterBuffer",
+    "fingerprint",
+    "SlowQueryLog",
+    "SlowQuery",
+    "StatementStats",
+    "StatementStat",
+    "PrometheusCollector",
+    "LeakDetector",
+    "BlockingDetector",
+    "set_blocking_threshold",
+    "get_blocking_detector",
+    "ExecutorLimiter",
+    "set_executor_limit",
+    "get_executor_limiter",
     "DataError",
     "DatabaseError",
     "Error",
@@ -0,0 +1,154 @@
+"""
+合并多个协程的小写入到同一个事务 (group commit)
+"""
+import asyncio
+import collections
+
+from .utils import create_future, create_task, run_native
+from .log import LOGGER as logger
+
+__all__ = ['WriteBatcher', 'WriteResult']
+
+WriteResult = collections.namedtuple('WriteResult', ['rowcount', 'lastrowid'])
+
+_SAVEPOINT = 'aiosqlite3_batch'
+
+
+def _run_batch(conn, statements):
+    """
+    在工作线程中用一个事务执行一批语句,
+    每条语句包在 savepoint 中, 失败的语句只回滚自己
+    """
+    if conn.in_transaction:
+        # 加入外部事务时提交由外部决定, 回滚会丢失已确认的写入
+        raise RuntimeError(
+            'cannot batch writes on a connection with an open transaction'
+        )
+    results = []
+    conn.execute('BEGIN')
+    try:
+        for sql, parameters in statements:
+            conn.execute('SAVEPOINT ' + _SAVEPOINT)
+            try:
+                cursor = conn.execute(sql, parameters)
+            except Exception as exc:
+                conn.execute('ROLLBACK TO SAVEPOINT ' + _SAVEPOINT)
+                results.append(exc)
+            else:
+                results.append(WriteResult(cursor.rowcount, cursor.lastrowid))
+                cursor.close()
+            conn.execute('RELEASE SAVEPOINT ' + _SAVEPOINT)
+        conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    return results
+
+
+class WriteBatcher:
+    """
+    收集 window 秒内或最多 max_batch 条写入, 在 target (Connection 或 Pool)
+    上用一个事务一次提交, 每个调用者得到自己的 WriteResult 或异常
+    target 为 Connection 且有未结束的事务时, 整批写入以 RuntimeError 失败,
+    不会加入该事务
+    """
+
+    def __init__(self, target, window=0.002, max_batch=100):
+        if max_batch < 1:
+            raise ValueError("max_batch should be greater than zero")
+        self._target = target
+        self._loop = target._loop
+        self._window = window
+        self._max_batch = max_batch
+        self._pending = []
+        self._handle = None
+        self._lock = asyncio.Lock(loop=self._loop)
+        self._tasks = set()
+        self._closed = False
+        self._batches = 0
+        self._statements = 0
+
+    @property
+    def pending(self):
+        """
+        等待提交的语句数
+        """
+        return len(self._pending)
+
+    @property
+    def batches(self):
+        """
+        已提交的批次数
+        """
+        return self._batches
+
+    @property
+    def statements(self):
+        """
+        已执行的语句数
+        """
+        return self._statements
+
+    @asyncio.coroutine
+    def execute(self, sql, parameters=None):
+        """
+        加入下一批写入, 批次提交后返回 WriteResult
+        """
+        if self._closed:
+            raise RuntimeError('batcher is closed')
+        fut = create_future(self._loop)
+        self._pending.append((sql, parameters or (), fut))
+        if len(self._pending) >= self._max_batch:
+            self.flush()
+        elif self._handle is None:
+            self._handle = self._loop.call_later(self._window, self.flush)
+        return (yield from fut)
+
+    def flush(self):
+        """
+        立即提交已收集的写入
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = create_task(self._run(batch), self._loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @asyncio.coroutine
+    def _run(self, batch):
+        # 同一时间只提交一批, 保证写入顺序
+        with (yield from self._lock):
+            statements = [(sql, parameters) for sql, parameters, _ in batch]
+            try:
+                results = yield from run_native(
+                    self._target,
+                    _run_batch,
+                    statements
+                )
+            except Exception as exc:
+                logger.warning('write batch failed', exc_info=True)
+                results = [exc] * len(batch)
+            self._batches += 1
+            self._statements += len(batch)
+        for (_, _, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    @asyncio.coroutine
+    def close(self):
+        """
+        提交剩余写入并等待完成
+        """
+        self._closed = True
+        self.flush()
+        while self._tasks:
+            yield from asyncio.gather(*self._tasks, loop=self._loop)
@@ -0,0 +1,112 @@
+"""
+检测在 loop 线程中同步执行 sqlite 操作造成的阻塞
+"""
+import asyncio
+import collections
+import time
+import traceback
+
+from .utils import caller_stack
+from .log import LOGGER as logger
+
+__all__ = [
+    'BlockingDetector',
+    'BlockingCall',
+    'set_blocking_threshold',
+    'get_blocking_detector'
+]
+
+_DETECTOR = None
+
+BlockingCall = collections.namedtuple(
+    'BlockingCall',
+    ['name', 'duration', 'stack']
+)
+
+# 同步调用对应的异步写法
+ALTERNATIVES = {
+    'Cursor.__next__': 'async for row in cursor / await cursor.fetchone()',
+    'Cursor.__exit__': 'async with / await cursor.close()',
+    'Connection.isolation_level':
+        'await connection.set_isolation_level(value)',
+    'Connection.row_factory': 'await connection.set_row_factory(value)',
+    'Connection.text_factory': 'await connection.set_text_factory(value)',
+    'Connection.__del__': 'await connection.close()',
+    'Pool.sync_close': 'pool.close(); await pool.wait_closed()',
+}
+
+if hasattr(asyncio, '_get_running_loop'):
+    _get_running_loop = asyncio._get_running_loop
+else:
+    # pragma: no cover
+    def _get_running_loop():
+        return None
+
+
+class BlockingDetector:
+    """
+    同步调用在运行中的 loop 线程里超过 threshold 秒时,
+    记录 warning 日志, 调用位置与对应的异步写法
+    """
+
+    def __init__(self, threshold=0.005, stack_limit=10, history=100):
+        self._threshold = threshold
+        self._stack_limit = stack_limit
+        self.calls = collections.deque(maxlen=history)
+        self.counts = collections.Counter()
+
+    @property
+    def threshold(self):
+        """
+        阻塞阈值(秒)
+        """
+        return self._threshold
+
+    def observe(self, name, duration):
+        """
+        记录一次同步调用的耗时
+        """
+        if duration < self._threshold or _get_running_loop() is None:
+            return
+        stack = caller_stack(self._stack_limit)
+        self.calls.append(BlockingCall(name, duration, stack))
+        self.counts[name] += 1
+        logger.warning(
+            '%s blocked the event loop for %.3fs, use %s instead, '
+            'called from:\n%s',
+            name,
+            duration,
+            ALTERNATIVES.get(name, 'the async api'),
+            ''.join(traceback.format_list(stack))
+        )
+
+
+def call(name, func, *args):
+    """
+    执行同步调用, 开启检测时计时
+    """
+    detector = _DETECTOR
+    if detector is None:
+        return func(*args)
+    start = time.monotonic()
+    try:
+        return func(*args)
+    finally:
+        detector.observe(name, time.monotonic() - start)
+
+
+def set_blocking_threshold(threshold):
+    """
+    检测所有同步调用, 阻塞 loop 超过 threshold 秒时告警, None 为关闭
+    返回新的 BlockingDetector
+    """
+    global _DETECTOR
+    _DETECTOR = None if threshold is None else BlockingDetector(threshold)
+    return _DETECTOR
+
+
+def get_blocking_detector():
+    """
+    当前的 BlockingDetector, 未开启时为 None
+    """
+    return _DETECTOR
@@ -0,0 +1,107 @@
+"""
+合并相同的并发只读查询 (singleflight)
+"""
+import asyncio
+
+from .utils import create_task, native_fetchall, run_native
+
+__all__ = ['ReadCoalescer']
+
+
+def _freeze(parameters):
+    """
+    把参数转为可哈希的 key, 不能转换时返回 None (不合并, 错误由 sqlite 报告)
+    key 包含值的类型, 1 与 1.0 相等但查询结果可能不同
+    """
+    if isinstance(parameters, dict):
+        try:
+            items = sorted(parameters.items())
+        except TypeError:
+            return None
+        frozen = tuple(
+            (name, type(value), value) for name, value in items
+        )
+    elif isinstance(parameters, (str, bytes)):
+        return None
+    else:
+        try:
+            frozen = tuple(
+                (type(value), value) for value in parameters
+            )
+        except TypeError:
+            return None
+    try:
+        hash(frozen)
+    except TypeError:
+        return None
+    return frozen
+
+
+class ReadCoalescer:
+    """
+    target (Connection 或 Pool) 上 sql 与参数都相同的只读查询
+    同一时间只执行一次, 所有调用者得到同一个结果
+    """
+
+    def __init__(self, target):
+        self._target = target
+        self._loop = target._loop
+        self._in_flight = {}
+        self._calls = 0
+        self._executions = 0
+
+    @property
+    def calls(self):
+        """
+        fetchall 调用次数
+        """
+        return self._calls
+
+    @property
+    def executions(self):
+        """
+        实际执行的查询次数
+        """
+        return self._executions
+
+    @property
+    def coalesced(self):
+        """
+        被合并(未实际执行)的调用次数
+        """
+        return self._calls - self._executions
+
+    @property
+    def in_flight(self):
+        """
+        正在执行的不同查询数
+        """
+        return len(self._in_flight)
+
+    @asyncio.coroutine
+    def fetchall(self, sql, parameters=None):
+        """
+        执行只读查询并返回全部记录, 相同的查询正在执行时直接等待其结果
+        """
+        if parameters is None:
+            parameters = ()
+        self._calls += 1
+        frozen = _freeze(parameters)
+        if frozen is None:
+            self._executions += 1
+            return (yield from self._execute(sql, parameters))
+        key = (sql, frozen)
+        task = self._in_flight.get(key)
+        if task is None:
+            self._executions += 1
+            task = create_task(self._execute(sql, parameters), self._loop)
+            self._in_flight[key] = task
+            task.add_done_callback(
+                lambda _: self._in_flight.pop(key, None)
+            )
+        # 单个调用者被取消时不影响其它调用者
+        rows = yield from asyncio.shield(task, loop=self._loop)
+        return list(rows)
+
+    def _execute(self, sql, parameters):
+        return run_native(self._target, native_fetchall, sql, parameters)
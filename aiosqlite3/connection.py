@@ -4,6 +4,7 @@
 import concurrent
 import asyncio
 import sqlite3
+import time
 from functools import partial
 from threading import Event
 from queue import Queue
@@ -16,6 +17,8 @@ from .utils import (
     proxy_property_directly
 )
 from .cursor import Cursor
+from .slowlog import SlowQueryLog
+from . import blocking, events, limiter
 from .log import LOGGER as logger
 
 __all__ = ['Connection', 'connect']
@@ -56,6 +59,7 @@ class Connection:
             check_same_thread=False,
             isolation_level='',
             sqlite=sqlite3,
+            slow_query_threshold=None,
             **kwargs
     ):
         if check_same_thread:
@@ -74,6 +78,14 @@ class Connection:
         self._check_same_thread = check_same_thread
         self._conn = None
         self._closed = False
+        self._query_count = 0
+        self._listeners = []
+        self._slow_query_log = None
+        if slow_query_threshold is not None:
+            self._slow_query_log = SlowQueryLog(slow_query_threshold, self)
+            self._listeners.append(self._slow_query_log)
+        self._row_factory = None
+        self._text_factory = str
         if check_same_thread:
             self._thread_lock = asyncio.Lock(loop=loop)
             self.tx_queue = Queue()
@@ -123,12 +135,119 @@ class Connection:
         if self._check_same_thread:
             future = yield from self._async_thread_execute(func)
         else:
-            future = yield from self._loop.run_in_executor(
-                self._executor,
-                func
-            )
+            future = yield from self._run_in_executor(func)
         return future
 
+    def _run_in_executor(self, func):
+        """
+        在 executor 中执行, 设置了 executor limit 时先排队
+        """
+        executor_limiter = limiter._LIMITER
+        if executor_limiter is None:
+            return self._loop.run_in_executor(self._executor, func)
+        return executor_limiter.run(self._loop, self._executor, func)
+
+    @property
+    def instrumented(self):
+        """
+        是否有语句事件监听
+        """
+        return bool(self._listeners or events._LISTENERS)
+
+    @property
+    def slow_query_log(self):
+        """
+        slow_query_threshold 对应的 SlowQueryLog, 未配置时为 None
+        """
+        return self._slow_query_log
+
+    def add_listener(self, listener):
+        """
+        监听该连接的语句事件, 见 events.StatementEvent
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        移除监听
+        """
+        self._listeners.remove(listener)
+
+    def _emit(self, event):
+        events.emit(event, self._listeners)
+
+    @asyncio.coroutine
+    def _execute_timed(self, event, field, func, *args):
+        """
+        执行并把排队耗时与 sqlite 耗时 (记到 event.field) 计入 event
+        """
+        timing = []
+
+        def timed():
+            timing.append(time.monotonic())
+            try:
+                return func(*args)
+            finally:
+                timing.append(time.monotonic())
+
+        submitted = time.monotonic()
+        try:
+            return (yield from self._execute(timed))
+        finally:
+            done = time.monotonic()
+            if len(timing) == 2:
+                started, finished = timing
+                event.queue_wait += started - submitted + done - finished
+                elapsed = getattr(event, field) + finished - started
+                setattr(event, field, elapsed)
+            else:
+                event.queue_wait += done - submitted
+
+    @asyncio.coroutine
+    def _execute_statement(self, event, func, *args):
+        """
+        带计时执行语句, 返回 (原生 cursor, event)
+        """
+        try:
+            cursor = yield from self._execute_timed(
+                event,
+                'execute_time',
+                func,
+                *args
+            )
+        except Exception as exc:
+            event.error = exc
+            self._emit(event)
+            raise
+        return cursor, event
+
+    def _create_statement_cursor(self, result):
+        """
+        创建代理cursor并继续记录语句的取数
+        """
+        cursor, event = result
+        cursor = self._create_cursor(cursor)
+        cursor._track(event)
+        return cursor
+
+    def _statement_cursor(self, method, func, sql, parameters):
+        """
+        执行语句返回支持await上下文的cursor, 有监听时记录事件
+        """
+        self._query_count += 1
+        if not self.instrumented:
+            if parameters is None:
+                coro = self._execute(func, sql)
+            else:
+                coro = self._execute(func, sql, parameters)
+            return self._create_context_cursor(coro)
+        event = events.StatementEvent(self, method, sql, parameters)
+        if parameters is None:
+            coro = self._execute_statement(event, func, sql)
+        else:
+            coro = self._execute_statement(event, func, sql, parameters)
+        return _LazyloadContextManager(coro, self._create_statement_cursor)
+
     @asyncio.coroutine
     def async_execute(self, func, *args, **kwargs):
         """
@@ -161,10 +280,7 @@ class Connection:
         """
         with (yield from self._thread_lock):
             func = partial(self._thread_execute, func)
-            future = yield from self._loop.run_in_executor(
-                self._executor,
-                func
-            )
+            future = yield from self._run_in_executor(func)
         return future
 
     def _thread_execute(self, func):
@@ -195,6 +311,8 @@ class Connection:
             **self._kwargs
         )
         self._conn = func
+        self._row_factory = func.row_factory
+        self._text_factory = func.text_factory
         self._log(
             'debug',
             'connect-> "%s" ok',
@@ -236,6 +354,20 @@ class Connection:
         """
         return self._closed
 
+    @property
+    def query_count(self):
+        """
+        执行过的sql语句数
+        """
+        return self._query_count
+
+    @property
+    def native_connection(self):
+        """
+        返回原生的connection
+        """
+        return self._conn
+
     @property
     def autocommit(self):
         """
@@ -257,7 +389,11 @@ class Connection:
         """
         if self._check_same_thread:
             func = partial(self._sync_setter, 'isolation_level', value)
-            self._thread_execute(func)
+            blocking.call(
+                'Connection.isolation_level',
+                self._thread_execute,
+                func
+            )
         else:
             self._conn.isolation_level = value
 
@@ -274,6 +410,27 @@ class Connection:
         """
         setattr(self._conn, field, value)
 
+    @asyncio.coroutine
+    def set_isolation_level(self, value):
+        """
+        在工作线程中设置 isolation_level, 不阻塞 loop
+        """
+        yield from self._execute(self._sync_setter, 'isolation_level', value)
+
+    @asyncio.coroutine
+    def set_row_factory(self, value):
+        """
+        在工作线程中设置 row_factory, 不阻塞 loop
+        """
+        yield from self._execute(self._sync_setter, 'row_factory', value)
+
+    @asyncio.coroutine
+    def set_text_factory(self, value):
+        """
+        在工作线程中设置 text_factory, 不阻塞 loop
+        """
+        yield from self._execute(self._sync_setter, 'text_factory', value)
+
     @row_factory.setter
     def row_factory(self, value):
         """
@@ -281,7 +438,11 @@ class Connection:
         """
         if self._check_same_thread:
             func = partial(self._sync_setter, 'row_factory', value)
-            self._thread_execute(func)
+            blocking.call(
+                'Connection.row_factory',
+                self._thread_execute,
+                func
+            )
         else:
             self._conn.row_factory = value
 
@@ -299,10 +460,44 @@ class Connection:
         """
         if self._check_same_thread:
             func = partial(self._sync_setter, 'text_factory', value)
-            self._thread_execute(func)
+            blocking.call(
+                'Connection.text_factory',
+                self._thread_execute,
+                func
+            )
         else:
             self._conn.text_factory = value
 
+    @property
+    def dirty(self):
+        """
+        是否有未结束的事务或修改过 row_factory, text_factory
+        """
+        conn = self._conn
+        return conn.in_transaction or \
+            conn.row_factory is not self._row_factory or \
+            conn.text_factory is not self._text_factory
+
+    @asyncio.coroutine
+    def reset(self, ping=False):
+        """
+        回滚未结束的事务, 还原 row_factory, text_factory,
+        ping 时再执行 SELECT 1 检查连接可用, 只需一次线程切换
+        """
+        return (yield from self._execute(self._reset, ping))
+
+    def _reset(self, ping):
+        """
+        在工作线程中重置连接状态
+        """
+        conn = self._conn
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = self._row_factory
+        conn.text_factory = self._text_factory
+        if ping:
+            conn.execute('SELECT 1').fetchall()
+
     def _create_cursor(self, cursor):
         """
         创建代理cursor
@@ -352,12 +547,16 @@ class Connection:
             'info',
             'connection.execute->\n  sql: %s\n  args: %s',
             sql,
-            str(parameters)
+            parameters
         )
         if parameters is None:
             parameters = []
-        coro = self._execute(self._conn.execute, sql, parameters)
-        return self._create_context_cursor(coro)
+        return self._statement_cursor(
+            'execute',
+            self._conn.execute,
+            sql,
+            parameters
+        )
 
     @asyncio.coroutine
     def executemany(
@@ -372,14 +571,14 @@ class Connection:
             'info',
             'connection.executemany->\n  sql: %s\n  args: %s',
             sql,
-            str(parameters)
+            parameters
         )
-        coro = self._execute(
+        return self._statement_cursor(
+            'executemany',
             self._conn.executemany,
             sql,
             parameters
         )
-        return self._create_context_cursor(coro)
 
     def executescript(
             self,
@@ -393,11 +592,12 @@ class Connection:
             'connection.executescript->\n  sql_script: %s',
             sql_script
         )
-        coro = self._execute(
+        return self._statement_cursor(
+            'executescript',
             self._conn.executescript,
-            sql_script
+            sql_script,
+            None
         )
-        return self._create_context_cursor(coro)
 
     def sync_close(self):
         """
@@ -405,26 +605,32 @@ class Connection:
         """
         self.__del__()
 
+    def _close_native(self):
+        """
+        同步关闭原生连接与线程
+        """
+        if self._check_same_thread:
+            if self._thread:
+                self._thread_execute(self._conn.close)
+                self._thread_execute('close')
+                self._thread = None
+                self._thread_lock = None
+                self.tx_queue = None
+                self.rx_queue = None
+                self.tx_event = None
+                self.rx_event = None
+            else:
+                # pragma: no cover
+                pass
+        else:
+            self._conn.close()
+
     def __del__(self):
         """
         关闭连接清理线程
         """
         if not self._closed:
-            if self._check_same_thread:
-                if self._thread:
-                    self._thread_execute(self._conn.close)
-                    self._thread_execute('close')
-                    self._thread = None
-                    self._thread_lock = None
-                    self.tx_queue = None
-                    self.rx_queue = None
-                    self.tx_event = None
-                    self.rx_event = None
-                else:
-                    # pragma: no cover
-                    pass
-            else:
-                self._conn.close()
+            blocking.call('Connection.__del__', self._close_native)
             self._conn = None
             self._sqlite = None
             database = self._database
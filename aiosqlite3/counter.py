@@ -0,0 +1,187 @@
+"""
+计数器写缓冲 (write-behind): 在内存中合并增量, 后台批量 UPSERT
+"""
+import asyncio
+import sqlite3
+
+from .utils import create_task, run_native
+from .log import LOGGER as logger
+
+__all__ = ['CounterBuffer']
+
+# UPSERT 需要 sqlite 3.24.0
+HAS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+
+class CounterBuffer:
+    """
+    incr 只在内存中按 key 合并增量, 第一个增量后最多 max_delay 秒
+    或积累 max_keys 个 key 时在后台用一个事务写入 table,
+    key_column 需要有唯一索引
+    target 为 Pool 时在 pool 关闭 (wait_closed) 前写入剩余增量
+    table, key_column, value_column 直接拼入 sql, 不能来自外部输入
+    target 为 Connection 且有未结束的事务时不写入, 增量保留并在
+    max_delay 秒后重试
+    """
+
+    def __init__(
+            self,
+            target,
+            table,
+            key_column,
+            value_column,
+            max_delay=1.0,
+            max_keys=1000
+    ):
+        self._target = target
+        self._loop = target._loop
+        self._max_delay = max_delay
+        self._max_keys = max_keys
+        params = {'t': table, 'k': key_column, 'v': value_column}
+        self._upsert_sql = (
+            'INSERT INTO %(t)s (%(k)s, %(v)s) VALUES (?, ?) '
+            'ON CONFLICT (%(k)s) DO UPDATE '
+            'SET %(v)s = %(v)s + excluded.%(v)s' % params
+        )
+        self._insert_sql = (
+            'INSERT OR IGNORE INTO %(t)s (%(k)s, %(v)s) VALUES (?, 0)' % params
+        )
+        self._update_sql = (
+            'UPDATE %(t)s SET %(v)s = %(v)s + ? WHERE %(k)s = ?' % params
+        )
+        self._pending = {}
+        self._handle = None
+        self._lock = asyncio.Lock(loop=self._loop)
+        self._tasks = set()
+        self._closed = False
+        self._flushes = 0
+        self._errors = 0
+        if hasattr(target, 'add_close_hook'):
+            target.add_close_hook(self._close_with)
+
+    @property
+    def pending(self):
+        """
+        尚未写入的 key 数
+        """
+        return len(self._pending)
+
+    @property
+    def flushes(self):
+        """
+        成功写入的批次数
+        """
+        return self._flushes
+
+    @property
+    def errors(self):
+        """
+        写入失败的批次数, 失败的增量会合并回缓冲区
+        """
+        return self._errors
+
+    def incr(self, key, amount=1):
+        """
+        增加 key 的计数, 不等待写入
+        """
+        if self._closed:
+            raise RuntimeError('counter buffer is closed')
+        self._pending[key] = self._pending.get(key, 0) + amount
+        if len(self._pending) >= self._max_keys:
+            self.flush()
+        elif self._handle is None:
+            self._handle = self._loop.call_later(self._max_delay, self.flush)
+
+    def flush(self):
+        """
+        在后台写入当前的增量
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._pending:
+            return
+        task = create_task(self._flush(), self._loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @asyncio.coroutine
+    def _flush(self, conn=None):
+        with (yield from self._lock):
+            if not self._pending:
+                return
+            items, self._pending = self._pending, {}
+            try:
+                yield from run_native(
+                    conn or self._target,
+                    self._write,
+                    list(items.items())
+                )
+            except Exception:
+                logger.warning('flush counters failed', exc_info=True)
+                self._errors += 1
+                for key, amount in items.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+                if not self._closed and self._handle is None:
+                    self._handle = self._loop.call_later(
+                        self._max_delay,
+                        self.flush
+                    )
+            else:
+                self._flushes += 1
+
+    def _write(self, conn, items):
+        """
+        在工作线程中用一个事务写入全部增量
+        """
+        if conn.in_transaction:
+            # 加入外部事务时提交由外部决定, 回滚会丢失已合并的增量
+            raise RuntimeError(
+                'cannot flush counters on a connection with an open '
+                'transaction'
+            )
+        conn.execute('BEGIN')
+        try:
+            if HAS_UPSERT:
+                conn.executemany(self._upsert_sql, items)
+            else:
+                # pragma: no cover
+                conn.executemany(
+                    self._insert_sql,
+                    [(key,) for key, _ in items]
+                )
+                conn.executemany(
+                    self._update_sql,
+                    [(amount, key) for key, amount in items]
+                )
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    @asyncio.coroutine
+    def _close_with(self, conn):
+        """
+        关闭: 等待后台写入结束后写入剩余增量
+        """
+        self._closed = True
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        while self._tasks:
+            yield from asyncio.gather(
+                *self._tasks,
+                loop=self._loop,
+                return_exceptions=True
+            )
+        yield from self._flush(conn)
+
+    @asyncio.coroutine
+    def close(self):
+        """
+        写入剩余增量并停止接收
+        """
+        if hasattr(self._target, 'remove_close_hook') and not self._closed:
+            self._target.remove_close_hook(self._close_with)
+        yield from self._close_with(None)
@@ -3,9 +3,9 @@
 代理游标
 """
 import asyncio
+from . import blocking, events
 from .log import LOGGER as logger
 from .utils import (
-    delegate_to_executor,
     proxy_property_directly,
     PY_35
 )
@@ -13,13 +13,6 @@ from .utils import (
 __all__ = ['Cursor']
 
 
-@delegate_to_executor(
-    '_cursor',
-    (
-        'fetchmany',
-        'fetchall'
-    )
-)
 @proxy_property_directly(
     '_cursor',
     (
@@ -39,6 +32,7 @@ class Cursor:
         self._echo = echo
         self._executor = None
         self._closed = False
+        self._statement = None
 
     def _log(self, level, message, *args):
         """
@@ -105,12 +99,112 @@ class Cursor:
         """
         return self._cursor
 
+    def _track(self, event):
+        """
+        语句执行完成, 有结果集时等取完数据再结束事件
+        """
+        event.rowcount = self._cursor.rowcount
+        if self._cursor.description is None:
+            self._conn._emit(event)
+        else:
+            self._statement = event
+
+    def _finish(self):
+        """
+        结束当前语句的事件
+        """
+        event = self._statement
+        if event is not None:
+            self._statement = None
+            self._conn._emit(event)
+
+    @asyncio.coroutine
+    def _run_statement(self, method, func, sql, *args):
+        """
+        执行语句, 有监听时记录事件
+        """
+        self._finish()
+        self._conn._query_count += 1
+        if not self._conn.instrumented:
+            return (yield from self._execute(func, sql, *args))
+        event = events.StatementEvent(
+            self._conn,
+            method,
+            sql,
+            args[0] if args else None
+        )
+        res, event = yield from self._conn._execute_statement(
+            event,
+            func,
+            sql,
+            *args
+        )
+        if method == 'executemany_returning':
+            event.rows = len(res)
+            self._conn._emit(event)
+        else:
+            self._track(event)
+        return res
+
+    @asyncio.coroutine
+    def _fetch(self, func, *args):
+        """
+        取数据, 有事件时记录 sqlite 耗时
+        """
+        event = self._statement
+        if event is None:
+            return (yield from self._execute(func, *args))
+        try:
+            return (yield from self._conn._execute_timed(
+                event,
+                'fetch_time',
+                func,
+                *args
+            ))
+        except Exception as exc:
+            event.error = exc
+            self._finish()
+            raise
+
     @asyncio.coroutine
     def fetchone(self):
         """
         获取一条记录
         """
-        res = yield from self._execute(self._cursor.fetchone)
+        event = self._statement
+        res = yield from self._fetch(self._cursor.fetchone)
+        if event is not None:
+            if res is None:
+                self._finish()
+            else:
+                event.rows += 1
+        return res
+
+    @asyncio.coroutine
+    def fetchmany(self, size=None):
+        """
+        获取多条记录
+        """
+        if size is None:
+            size = self._cursor.arraysize
+        event = self._statement
+        res = yield from self._fetch(self._cursor.fetchmany, size)
+        if event is not None:
+            event.rows += len(res)
+            if len(res) < size:
+                self._finish()
+        return res
+
+    @asyncio.coroutine
+    def fetchall(self):
+        """
+        获取全部记录
+        """
+        event = self._statement
+        res = yield from self._fetch(self._cursor.fetchall)
+        if event is not None:
+            event.rows += len(res)
+            self._finish()
         return res
 
     @asyncio.coroutine
@@ -122,13 +216,17 @@ class Cursor:
             'info',
             'cursor.execute->\n  sql: %s\n  args: %s',
             sql,
-            str(parameters)
+            parameters
         )
         if parameters is None:
             # pragma: no cover
             parameters = []
-        res = yield from self._execute(self._cursor.execute, sql, parameters)
-        return res
+        return (yield from self._run_statement(
+            'execute',
+            self._cursor.execute,
+            sql,
+            parameters
+        ))
 
     @asyncio.coroutine
     def executemany(self, sql, parameters):
@@ -139,14 +237,43 @@ class Cursor:
             'info',
             'cursor.executemany->\n  sql: %s\n  args: %s',
             sql,
-            str(parameters)
+            parameters
         )
-        res = yield from self._execute(
+        return (yield from self._run_statement(
+            'executemany',
             self._cursor.executemany,
             sql,
             parameters
+        ))
+
+    @asyncio.coroutine
+    def executemany_returning(self, sql, parameters):
+        """
+        批量执行带 RETURNING 的sql语句, 一次线程切换返回所有行
+        """
+        self._log(
+            'info',
+            'cursor.executemany_returning->\n  sql: %s\n  args: %s',
+            sql,
+            parameters
         )
-        return res
+        return (yield from self._run_statement(
+            'executemany_returning',
+            self._executemany_returning,
+            sql,
+            parameters
+        ))
+
+    def _executemany_returning(self, sql, parameters):
+        """
+        在线程中逐条执行并收集结果
+        """
+        cursor = self._cursor
+        rows = []
+        for params in parameters:
+            cursor.execute(sql, params)
+            rows.extend(cursor.fetchall())
+        return rows
 
     @asyncio.coroutine
     def executescript(self, sql_script):
@@ -158,8 +285,11 @@ class Cursor:
             'cursor.executescript->\n  sql_script: %s',
             sql_script
         )
-        res = yield from self._execute(self._cursor.executescript, sql_script)
-        return res
+        return (yield from self._run_statement(
+            'executescript',
+            self._cursor.executescript,
+            sql_script
+        ))
 
     @asyncio.coroutine
     def close(self):
@@ -167,6 +297,7 @@ class Cursor:
         关闭
         """
         if not self._closed:
+            self._finish()
             yield from self._execute(self._cursor.close)
             self._closed = True
 
@@ -188,7 +319,12 @@ class Cursor:
         exit
         """
         if not self._closed:
-            self._conn.sync_execute(self._cursor.close)
+            self._finish()
+            blocking.call(
+                'Cursor.__exit__',
+                self._conn.sync_execute,
+                self._cursor.close
+            )
             self._closed = True
 
     def __iter__(self):
@@ -201,10 +337,17 @@ class Cursor:
         """
         next
         """
-        res = self._conn.sync_execute(self._cursor.fetchone)
+        res = blocking.call(
+            'Cursor.__next__',
+            self._conn.sync_execute,
+            self._cursor.fetchone
+        )
         if res is None:
+            self._finish()
             raise StopIteration
         else:
+            if self._statement is not None:
+                self._statement.rows += 1
             return res
 
     def __del__(self):
@@ -212,6 +355,8 @@ class Cursor:
         回收引用
         """
         if not self._closed:
+            if self._conn is not None:
+                self._finish()
             self._conn = None
             self._cursor = None
             self._loop = None
@@ -0,0 +1,87 @@
+"""
+语句执行事件: 区分排队, sqlite 执行与取数耗时
+"""
+from .log import LOGGER as logger
+
+__all__ = ['StatementEvent', 'add_listener', 'remove_listener']
+
+_LISTENERS = []
+
+
+class StatementEvent:
+    """
+    一条语句的执行记录, 语句结束 (取完数据, cursor 关闭或重新执行) 时
+    交给监听函数
+    queue_wait: 不在 sqlite 中的耗时 (等待锁, 线程池排队, 唤醒 loop)
+    execute_time: sqlite 执行语句的耗时
+    fetch_time: 取数据时 sqlite 的耗时
+    rows: 取回的记录数, rowcount: 影响的记录数
+    error: 执行失败时的异常
+    """
+    __slots__ = (
+        'connection',
+        'method',
+        'sql',
+        'parameters',
+        'queue_wait',
+        'execute_time',
+        'fetch_time',
+        'rows',
+        'rowcount',
+        'error',
+        'finished'
+    )
+
+    def __init__(self, connection, method, sql, parameters):
+        self.connection = connection
+        self.method = method
+        self.sql = sql
+        self.parameters = parameters
+        self.queue_wait = 0.0
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.rows = 0
+        self.rowcount = -1
+        self.error = None
+        self.finished = False
+
+    @property
+    def duration(self):
+        """
+        总耗时
+        """
+        return self.queue_wait + self.execute_time + self.fetch_time
+
+    def __repr__(self):
+        return '<StatementEvent %s %.6fs rows=%d sql=%r>' % (
+            self.method,
+            self.duration,
+            self.rows,
+            self.sql
+        )
+
+
+def add_listener(listener):
+    """
+    监听所有连接的语句事件, listener(event) 在 loop 中同步调用
+    """
+    _LISTENERS.append(listener)
+
+
+def remove_listener(listener):
+    """
+    移除监听
+    """
+    _LISTENERS.remove(listener)
+
+
+def emit(event, listeners):
+    """
+    通知全局与连接的监听函数, 监听函数的异常只记录日志
+    """
+    event.finished = True
+    for listener in _LISTENERS + listeners:
+        try:
+            listener(event)
+        except Exception:
+            logger.exception('statement listener %r failed', listener)
@@ -0,0 +1,55 @@
+"""
+sql 指纹: 去掉字面量与参数名, 合并空白
+"""
+import functools
+import re
+
+__all__ = ['fingerprint']
+
+# 从左到右匹配字符串, 带引号的标识符与注释, 字符串中的 -- 或 /* 不是注释
+_LEXEME = re.compile(
+    r"(?P<string>[xX]?'(?:[^']|'')*')"
+    r'|(?P<ident>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])'
+    r'|--[^\n]*|/\*.*?(?:\*/|$)',
+    re.S
+)
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d*)?(?:[eE][-+]?\d+)?\b')
+# 前面是运算符, 括号, 逗号或关键字时 +/- 是一元符号, 属于字面量
+_UNARY = re.compile(
+    r'(^|[=<>!(,*/%|~]|[-+]\s|\b(?:AND|OR|NOT|WHERE|SELECT|BY|THEN|ELSE|'
+    r'WHEN|CASE|VALUES|IN|IS|LIKE|BETWEEN|LIMIT|OFFSET|SET|ON|HAVING)\b)'
+    r'(\s*)[-+]\s*\?',
+    re.I
+)
+# 其余的 +/- 是二元运算符, 统一两侧空白
+_BINARY = re.compile(r'(?<=[\w?)\]])\s*([-+])\s*(?=[\w?(])')
+_PARAM = re.compile(r'\?\d*|[:@$][A-Za-z_]\w*')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_VALUES = re.compile(
+    r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+'
+)
+_SPACE = re.compile(r'\s+')
+
+
+def _replace_lexeme(match):
+    if match.group('string') is not None:
+        return '?'
+    if match.group('ident') is not None:
+        return match.group('ident')
+    return ' '
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """
+    归一化 sql, 字面量与参数都变为 ?, IN 列表变为 IN (...),
+    多行 VALUES 只保留一行
+    """
+    sql = _LEXEME.sub(_replace_lexeme, sql)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _UNARY.sub(r'\1\2?', sql)
+    sql = _BINARY.sub(r' \1 ', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES.sub(r'\1', sql)
+    return _SPACE.sub(' ', sql).strip()
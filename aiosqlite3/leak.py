@@ -0,0 +1,157 @@
+"""
+连接泄漏检测: 记录连接取出时间与 (抽样的) 调用栈
+"""
+import collections
+import random
+import traceback
+
+from .utils import caller_stack
+from .log import LOGGER as logger
+
+__all__ = ['LeakDetector', 'Holder']
+
+Holder = collections.namedtuple(
+    'Holder',
+    ['connection', 'acquired_at', 'held', 'stack']
+)
+
+
+class LeakDetector:
+    """
+    通过 Pool(leak_detector=...) 绑定, 记录 acquire 取出的每个连接的时间,
+    按 sample_rate 抽样记录调用栈 (extract_stack 相对 acquire 较慢)
+    每 interval 秒 (默认 threshold 的一半) 检查一次,
+    连接被持有超过 threshold 秒时记录一次 warning
+    """
+
+    def __init__(
+            self,
+            threshold=30.0,
+            sample_rate=0.1,
+            interval=None,
+            stack_limit=20
+    ):
+        self._threshold = threshold
+        self._sample_rate = sample_rate
+        self._interval = interval or threshold / 2
+        self._stack_limit = stack_limit
+        self._pool = None
+        self._handle = None
+        self._checkouts = {}
+        self._warned = set()
+        self._leaks = 0
+
+    @property
+    def pool(self):
+        """
+        绑定的 pool
+        """
+        return self._pool
+
+    @property
+    def leaks(self):
+        """
+        超过阈值而告警的次数
+        """
+        return self._leaks
+
+    def attach(self, pool):
+        """
+        绑定 pool 并开始定时检查
+        """
+        if self._pool is not None:
+            raise RuntimeError('leak detector is already attached to a pool')
+        self._pool = pool
+        self._schedule()
+
+    def detach(self):
+        """
+        停止检查
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pool = None
+        self._checkouts.clear()
+        self._warned.clear()
+
+    def _sampled(self):
+        return self._sample_rate >= 1 or random.random() < self._sample_rate
+
+    def checkout(self, conn, sample=True):
+        """
+        连接被取出, sample 为 False 时稍后由 sample 记录调用栈
+        """
+        if self._pool is None:
+            return
+        stack = None
+        if sample and self._sampled():
+            stack = caller_stack(self._stack_limit)
+        self._checkouts[conn] = (self._pool._loop.time(), stack)
+
+    def sample(self, conn):
+        """
+        按 sample_rate 为已取出的连接记录当前调用栈
+        """
+        checkout = self._checkouts.get(conn)
+        if checkout is not None and checkout[1] is None and self._sampled():
+            self._checkouts[conn] = (
+                checkout[0],
+                caller_stack(self._stack_limit)
+            )
+
+    def checkin(self, conn):
+        """
+        连接被放回
+        """
+        if self._checkouts.pop(conn, None) is not None:
+            self._warned.discard(conn)
+
+    def holders(self):
+        """
+        当前持有的连接, 持有最久的在前, 解除绑定后为空
+        """
+        if self._pool is None:
+            return []
+        now = self._pool._loop.time()
+        holders = [
+            Holder(conn, acquired_at, now - acquired_at, stack)
+            for conn, (acquired_at, stack) in self._checkouts.items()
+        ]
+        holders.sort(key=lambda holder: holder.acquired_at)
+        return holders
+
+    def _schedule(self):
+        self._handle = self._pool._loop.call_later(
+            self._interval,
+            self._tick
+        )
+
+    def _tick(self):
+        self.check()
+        if self._pool is not None:
+            self._schedule()
+
+    def check(self):
+        """
+        检查一次, 返回新发现的超时持有者
+        """
+        found = []
+        for holder in self.holders():
+            if holder.held < self._threshold:
+                break
+            if holder.connection in self._warned:
+                continue
+            self._warned.add(holder.connection)
+            self._leaks += 1
+            found.append(holder)
+            logger.warning(
+                'connection %r held for %.1fs (threshold %.1fs), '
+                'acquired at:\n%s',
+                holder.connection,
+                holder.held,
+                self._threshold,
+                ''.join(traceback.format_list(holder.stack))
+                if holder.stack else '  (stack not sampled)\n'
+            )
+        return found
@@ -0,0 +1,140 @@
+"""
+进程内共享的线程池调用并发限制
+"""
+import asyncio
+import collections
+
+from .metrics import Reservoir
+from .utils import create_future
+
+__all__ = ['ExecutorLimiter', 'set_executor_limit', 'get_executor_limiter']
+
+_LIMITER = None
+
+
+class ExecutorLimiter:
+    """
+    限制同时进入线程池执行的 sqlite 操作数, 超出的按先进先出排队
+    所有 Connection 共用, 只应在同一个 loop 中使用
+    """
+
+    def __init__(self, limit):
+        if limit < 1:
+            raise ValueError("limit should be greater than zero")
+        self._limit = limit
+        self._running = 0
+        self._waiters = collections.deque()
+        self._wait_times = Reservoir()
+
+    @property
+    def limit(self):
+        """
+        最多同时执行的操作数
+        """
+        return self._limit
+
+    @property
+    def running(self):
+        """
+        正在线程池中执行的操作数
+        """
+        return self._running
+
+    @property
+    def queued(self):
+        """
+        排队等待执行的操作数
+        """
+        return len(self._waiters)
+
+    @property
+    def wait_times(self):
+        """
+        最近排队耗时(秒)的样本
+        """
+        return self._wait_times
+
+    def stats(self):
+        """
+        当前状态
+        """
+        return {
+            'limit': self._limit,
+            'running': self._running,
+            'queued': len(self._waiters),
+        }
+
+    @asyncio.coroutine
+    def run(self, loop, executor, func):
+        """
+        获得执行名额后在 executor 中执行 func
+        """
+        if self._running < self._limit and not self._waiters:
+            self._running += 1
+            self._wait_times.add(0.0)
+        else:
+            yield from self._wait(loop)
+        try:
+            fut = loop.run_in_executor(executor, func)
+        except BaseException:
+            # pragma: no cover
+            self._release()
+            raise
+        # 调用者被取消时线程仍在执行, 名额在线程结束后才释放
+        fut.add_done_callback(self._release_done)
+        return (yield from asyncio.shield(fut, loop=loop))
+
+    def _release_done(self, fut):
+        if not fut.cancelled():
+            # 调用者已取消时避免 "exception was never retrieved"
+            fut.exception()
+        self._release()
+
+    @asyncio.coroutine
+    def _wait(self, loop):
+        start = loop.time()
+        fut = create_future(loop)
+        self._waiters.append(fut)
+        try:
+            yield from fut
+        except BaseException:
+            if fut.done() and not fut.cancelled():
+                # 名额已转交, 再交给下一个
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    # pragma: no cover
+                    pass
+            raise
+        self._wait_times.add(loop.time() - start)
+
+    def _release(self):
+        """
+        名额直接转交给最早的等待者
+        """
+        waiters = self._waiters
+        while waiters:
+            fut = waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._running -= 1
+
+
+def set_executor_limit(limit):
+    """
+    设置进程内所有 Connection 的线程池调用并发上限, None 为不限制
+    返回新的 ExecutorLimiter
+    """
+    global _LIMITER
+    _LIMITER = None if limit is None else ExecutorLimiter(limit)
+    return _LIMITER
+
+
+def get_executor_limiter():
+    """
+    当前的 ExecutorLimiter, 未设置时为 None
+    """
+    return _LIMITER
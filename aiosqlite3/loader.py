@@ -0,0 +1,140 @@
+"""
+把同一轮事件循环中的单 key 查询合并为批量查询 (DataLoader)
+"""
+import asyncio
+import collections
+
+from .utils import (
+    SQLITE_MAX_VARIABLE_NUMBER,
+    create_future,
+    create_task,
+    native_fetchall,
+    run_native
+)
+
+__all__ = ['Loader', 'table_loader']
+
+
+class Loader:
+    """
+    收集同一轮事件循环中 load 的 key, 去重后每 max_batch 个调用一次
+    batch_fn(keys), batch_fn 返回 {key: value}, 没有的 key 得到 None
+    """
+
+    def __init__(
+            self,
+            batch_fn,
+            loop=None,
+            max_batch=SQLITE_MAX_VARIABLE_NUMBER
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch should be greater than zero")
+        self._batch_fn = batch_fn
+        self._loop = loop or asyncio.get_event_loop()
+        self._max_batch = max_batch
+        self._queue = collections.OrderedDict()
+        self._loads = 0
+        self._batches = 0
+
+    @property
+    def loads(self):
+        """
+        load 调用次数
+        """
+        return self._loads
+
+    @property
+    def batches(self):
+        """
+        batch_fn 调用次数
+        """
+        return self._batches
+
+    @asyncio.coroutine
+    def load(self, key):
+        """
+        加载一个 key
+        """
+        self._loads += 1
+        fut = self._queue.get(key)
+        if fut is None:
+            if not self._queue:
+                self._loop.call_soon(self._dispatch)
+            fut = self._queue[key] = create_future(self._loop)
+        # 单个调用者被取消时不影响相同 key 的其它调用者
+        return (yield from asyncio.shield(fut, loop=self._loop))
+
+    @asyncio.coroutine
+    def load_many(self, keys):
+        """
+        加载多个 key, 按顺序返回
+        """
+        return (yield from asyncio.gather(
+            *[self.load(key) for key in keys],
+            loop=self._loop
+        ))
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, collections.OrderedDict()
+        keys = list(queue)
+        for start in range(0, len(keys), self._max_batch):
+            chunk = keys[start:start + self._max_batch]
+            create_task(self._run(chunk, queue), self._loop)
+
+    @asyncio.coroutine
+    def _run(self, keys, futures):
+        self._batches += 1
+        try:
+            values = yield from self._batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                futures[key].set_exception(exc)
+            return
+        else:
+            for key in keys:
+                futures[key].set_result(values.get(key))
+        finally:
+            # 批次任务被取消 (如 loop 关闭) 时不让调用者一直等待
+            for key in keys:
+                if not futures[key].done():
+                    futures[key].cancel()
+
+
+def table_loader(
+        target,
+        table,
+        key_column,
+        columns='*',
+        many=False,
+        max_batch=SQLITE_MAX_VARIABLE_NUMBER
+):
+    """
+    按 key_column 从 table 加载记录的 Loader, target 为 Connection 或 Pool
+    每批只执行一次 SELECT ... WHERE key_column IN (...)
+    many 为真时每个 key 得到记录列表, 否则得到一条记录
+    table, key_column, columns 直接拼入 sql, 不能来自外部输入
+    """
+    sql_head = 'SELECT %s, %s FROM %s WHERE %s IN (' % (
+        key_column,
+        columns,
+        table,
+        key_column
+    )
+
+    @asyncio.coroutine
+    def batch_fn(keys):
+        sql = sql_head + ', '.join('?' * len(keys)) + ')'
+        rows = yield from run_native(target, native_fetchall, sql, keys)
+        values = {}
+        for row in rows:
+            row = tuple(row)
+            if many:
+                values.setdefault(row[0], []).append(row[1:])
+            else:
+                values[row[0]] = row[1:]
+        if many:
+            for key in keys:
+                values.setdefault(key, [])
+        return values
+
+    return Loader(batch_fn, loop=target._loop, max_batch=max_batch)
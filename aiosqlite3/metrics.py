@@ -0,0 +1,115 @@
+"""
+统计工具
+"""
+import bisect
+import collections
+
+__all__ = ['Reservoir', 'Histogram', 'percentiles']
+
+# 秒, 与 prometheus client 的默认分桶一致并补充亚毫秒级
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def percentiles(values, percents=(50, 90, 99)):
+    """
+    计算多个分位数 (nearest-rank), 没有样本时为 0
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {percent: 0.0 for percent in percents}
+    last = len(ordered) - 1
+    return {
+        percent: ordered[min(last, int(round(percent / 100.0 * last)))]
+        for percent in percents
+    }
+
+
+class Reservoir:
+    """
+    保存最近 size 个样本, 用于计算分位数
+    """
+    __slots__ = ('_samples', 'count', 'total')
+
+    def __init__(self, size=1024):
+        self._samples = collections.deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, value):
+        """
+        记录一个样本
+        """
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent):
+        """
+        最近样本的分位数 (nearest-rank), 没有样本时为 0
+        """
+        return self.percentiles((percent,))[percent]
+
+    def percentiles(self, percents=(50, 90, 99)):
+        """
+        一次排序计算多个分位数
+        """
+        return percentiles(self._samples, percents)
+
+    def latest(self, count):
+        """
+        最近 count 个样本
+        """
+        samples = self._samples
+        count = min(count, len(samples))
+        if count <= 0:
+            return []
+        return list(samples)[-count:]
+
+    def clear(self):
+        """
+        清空样本与计数
+        """
+        self._samples.clear()
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram:
+    """
+    固定分桶的累计直方图, 样本 <= 上界时计入该桶
+    """
+    __slots__ = ('buckets', '_counts', 'count', 'total')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        """
+        记录一个样本
+        """
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative(self):
+        """
+        [(上界, 不大于上界的样本数), ...], 最后一个上界为 inf
+        """
+        result = []
+        count = 0
+        for bound, bucket in zip(
+                self.buckets + (float('inf'),),
+                self._counts
+        ):
+            count += bucket
+            result.append((bound, count))
+        return result
@@ -4,11 +4,37 @@ pool
 
 import asyncio
 import collections
+from . import blocking
 from .connection import connect
-from .utils import _PoolContextManager, _PoolAcquireContextManager, PY_35
-# from .log import logger
+from .metrics import Histogram, Reservoir
+from .slowlog import SlowQueryLog
+from .utils import (
+    _PoolContextManager,
+    _PoolAcquireContextManager,
+    PY_35,
+    create_future,
+    create_task
+)
+from .log import LOGGER as logger
 
-__all__ = ['create_pool', 'Pool']
+__all__ = [
+    'create_pool',
+    'Pool',
+    'PoolOverloadedError',
+    'PoolQuotaExceededError'
+]
+
+
+class PoolOverloadedError(RuntimeError):
+    """
+    等待连接的协程数已达到 max_waiters, acquire 立即失败
+    """
+
+
+class PoolQuotaExceededError(PoolOverloadedError):
+    """
+    key 使用的连接数已达到 max_per_key 且 quota_policy 为 fail
+    """
 
 
 def create_pool(
@@ -17,10 +43,13 @@ def create_pool(
         maxsize=10,
         echo=False,
         loop=None,
+        background_warmup=False,
         **kwargs
 ):
     """
     创建支持上下文管理的pool
+    minsize 个连接并发创建, background_warmup 时第一个连接就绪即返回,
+    其余连接在后台创建
     """
     coro = _create_pool(
         database=database,
@@ -28,6 +57,7 @@ def create_pool(
         maxsize=maxsize,
         echo=echo,
         loop=loop,
+        background_warmup=background_warmup,
         **kwargs
     )
     return _PoolContextManager(coro)
@@ -40,6 +70,7 @@ def _create_pool(
         maxsize=10,
         echo=False,
         loop=None,
+        background_warmup=False,
         **kwargs
 ):
     if loop is None:
@@ -54,10 +85,147 @@ def _create_pool(
     )
     if minsize > 0:
         with (yield from pool._cond):
-            yield from pool._fill_free_pool(False)
+            if background_warmup:
+                yield from pool._open_many(1)
+                pool._grow(minsize - pool.size)
+            else:
+                yield from pool._fill_free_pool(False)
     return pool
 
 
+class _WaiterQueue:
+    """
+    按优先级分组的等待队列, priority 越大越优先
+    strict: 总是先服务优先级最高的组
+    weighted: 按 weights 对各组做平滑加权轮询, 未配置的权重为 1
+    同一组内按 key 轮询, 同一 key 先进先出
+    """
+
+    def __init__(self, policy='strict', weights=None):
+        if policy not in ('strict', 'weighted'):
+            raise ValueError(
+                "priority_policy should be 'strict' or 'weighted'"
+            )
+        self._policy = policy
+        self._weights = weights or {}
+        self._groups = {}
+        self._current = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, fut, priority=0, first=False, key=None):
+        """
+        加入等待, first 时排到同组队首
+        """
+        group = self._groups.get(priority)
+        if group is None:
+            group = self._groups[priority] = collections.OrderedDict()
+        queue = group.get(key)
+        if queue is None:
+            queue = group[key] = collections.deque()
+        if first:
+            queue.appendleft(fut)
+            group.move_to_end(key, last=False)
+        else:
+            queue.append(fut)
+        self._count += 1
+
+    def waiting(self, priority=0, allowed_key=None):
+        """
+        是否有优先级不低于 priority 且 key 可被服务的等待者
+        """
+        return any(
+            self._has_key(group, allowed_key)
+            for group_priority, group in self._groups.items()
+            if group_priority >= priority
+        )
+
+    def remove(self, fut, priority=0, key=None):
+        """
+        移除等待者, 不存在时抛出 ValueError
+        """
+        group = self._groups.get(priority)
+        if group is None or key not in group:
+            raise ValueError(fut)
+        group[key].remove(fut)
+        self._count -= 1
+        self._drop_empty(priority, key)
+
+    def pop(self, allowed=None, allowed_key=None):
+        """
+        取出下一个未完成的等待者 (fut, priority, key),
+        没有时返回 (None, None, None)
+        allowed(priority) 或 allowed_key(key) 为假的等待者本次跳过
+        """
+        while True:
+            priority = self._select(allowed, allowed_key)
+            if priority is None:
+                return None, None, None
+            group = self._groups[priority]
+            key = next(
+                key for key in group
+                if allowed_key is None or allowed_key(key)
+            )
+            fut = group[key].popleft()
+            self._count -= 1
+            if not self._drop_empty(priority, key):
+                # 轮到下一个 key
+                group.move_to_end(key)
+            if not fut.done():
+                return fut, priority, key
+
+    def _drop_empty(self, priority, key):
+        group = self._groups[priority]
+        if group[key]:
+            return False
+        del group[key]
+        if not group:
+            del self._groups[priority]
+        return True
+
+    @staticmethod
+    def _has_key(group, allowed_key):
+        return allowed_key is None or any(allowed_key(key) for key in group)
+
+    def _select(self, allowed, allowed_key):
+        candidates = [
+            priority for priority, group in self._groups.items()
+            if (allowed is None or allowed(priority)) and
+            self._has_key(group, allowed_key)
+        ]
+        if not candidates:
+            return None
+        if self._policy == 'strict' or len(candidates) == 1:
+            return max(candidates)
+        total = 0
+        best = None
+        current = self._current
+        for priority in sorted(candidates, reverse=True):
+            weight = self._weights.get(priority, 1)
+            total += weight
+            current[priority] = current.get(priority, 0) + weight
+            if best is None or current[priority] > current[best]:
+                best = priority
+        current[best] -= total
+        return best
+
+    def popall(self):
+        """
+        取出全部等待者
+        """
+        futs = [
+            fut
+            for group in self._groups.values()
+            for queue in group.values()
+            for fut in queue
+        ]
+        self._groups.clear()
+        self._count = 0
+        return futs
+
+
 class Pool(asyncio.AbstractServer):
     """
     Connection pool
@@ -70,13 +238,30 @@ class Pool(asyncio.AbstractServer):
             maxsize,
             echo,
             loop,
+            acquire_timeout=None,
+            max_waiters=None,
+            max_lifetime=None,
+            max_idle=None,
+            max_queries=None,
+            sizer=None,
+            reset_on_release=True,
+            ping_on_release=False,
+            priority_policy='strict',
+            priority_weights=None,
+            reserved=None,
+            max_per_key=None,
+            quota_policy='queue',
+            slow_query_threshold=None,
+            leak_detector=None,
             **kwargs
     ):
+        # 构造失败时 __del__ 也会调用 close, 先标记为已关闭
+        self._closed = True
+        if quota_policy not in ('queue', 'fail'):
+            raise ValueError("quota_policy should be 'queue' or 'fail'")
         if minsize < 0:
-            self._closed = True
             raise ValueError("minsize should be zero or greater")
         if maxsize < minsize:
-            self._closed = True
             raise ValueError("maxsize should be not less than minsize")
         self._database = database
         self._minsize = minsize
@@ -85,11 +270,53 @@ class Pool(asyncio.AbstractServer):
         self._acquiring = 0
         self._free = collections.deque(maxlen=maxsize)
         self._cond = asyncio.Condition(loop=loop)
+        self._waiters = _WaiterQueue(priority_policy, priority_weights)
+        self._reserved = dict(reserved or {})
+        self._holders = {}
+        self._in_use = collections.Counter()
+        self._class_wait_times = {}
+        self._max_per_key = max_per_key
+        self._quota_policy = quota_policy
+        self._key_of = {}
+        self._key_in_use = collections.Counter()
+        self._quota_queued = collections.Counter()
+        self._quota_rejected = collections.Counter()
+        self._acquire_timeout = acquire_timeout
+        self._max_waiters = max_waiters
+        self._wait_times = Reservoir()
+        self._wait_histogram = Histogram()
+        self._counters = collections.Counter()
+        self._max_lifetime = max_lifetime
+        self._max_idle = max_idle
+        self._max_queries = max_queries
+        self._reset_on_release = reset_on_release
+        self._ping_on_release = ping_on_release
+        self._created = {}
+        self._idle_since = {}
+        self._tasks = set()
+        self._close_hooks = []
+        self._listeners = []
         self._used = set()
         self._terminated = set()
         self._closing = False
         self._closed = False
         self._echo = echo
+        self._housekeeping = None
+        if max_lifetime or max_idle:
+            self._housekeeping_interval = min(
+                value for value in (max_lifetime, max_idle) if value
+            ) / 2
+            self._schedule_housekeeping()
+        self._sizer = sizer
+        if sizer is not None:
+            sizer.attach(self)
+        self._leak_detector = leak_detector
+        if leak_detector is not None:
+            leak_detector.attach(self)
+        self._slow_query_log = None
+        if slow_query_threshold is not None:
+            self._slow_query_log = SlowQueryLog(slow_query_threshold, self)
+            self.add_listener(self._slow_query_log)
 
     @property
     def echo(self):
@@ -133,6 +360,90 @@ class Pool(asyncio.AbstractServer):
         """
         return self._closed
 
+    @property
+    def waiters(self):
+        """
+        当前等待连接的协程数
+        """
+        return len(self._waiters)
+
+    @property
+    def max_waiters(self):
+        """
+        最多允许的等待数, None 为不限制
+        """
+        return self._max_waiters
+
+    @property
+    def wait_times(self):
+        """
+        最近 acquire 等待耗时(秒)的样本
+        """
+        return self._wait_times
+
+    @property
+    def wait_histogram(self):
+        """
+        acquire 等待时间的累计直方图 (秒)
+        """
+        return self._wait_histogram
+
+    @property
+    def counters(self):
+        """
+        累计计数: acquires, acquire_timeouts, acquire_rejected, releases,
+        connects, connect_errors, closes
+        acquires/releases 包括 pool 内部 (如慢查询 EXPLAIN) 取出的连接
+        """
+        return dict(self._counters)
+
+    @property
+    def class_wait_times(self):
+        """
+        按 acquire priority 分组的等待耗时样本
+        """
+        return dict(self._class_wait_times)
+
+    @property
+    def reserved(self):
+        """
+        各优先级保留的连接数
+        """
+        return dict(self._reserved)
+
+    @property
+    def max_per_key(self):
+        """
+        每个 key 最多同时使用的连接数, None 为不限制
+        """
+        return self._max_per_key
+
+    def quota_stats(self):
+        """
+        每个 key 正在使用, 因配额排队过, 因配额被拒绝的次数
+        """
+        keys = set(self._key_in_use) | set(self._quota_queued) | \
+            set(self._quota_rejected)
+        return {
+            key: {
+                'in_use': self._key_in_use[key],
+                'queued': self._quota_queued[key],
+                'rejected': self._quota_rejected[key],
+            }
+            for key in keys
+        }
+
+    def wait_time_percentiles(self, percents=(50, 90, 99), priority=None):
+        """
+        acquire 等待耗时的分位数, 指定 priority 时只统计该优先级
+        """
+        if priority is None:
+            return self._wait_times.percentiles(percents)
+        reservoir = self._class_wait_times.get(priority)
+        if reservoir is None:
+            return {percent: 0.0 for percent in percents}
+        return reservoir.percentiles(percents)
+
     @asyncio.coroutine
     def clear(self):
         """
@@ -141,6 +452,7 @@ class Pool(asyncio.AbstractServer):
         with (yield from self._cond):
             while self._free:
                 conn = self._free.popleft()
+                self._forget(conn)
                 yield from conn.close()
             self._cond.notify()
 
@@ -153,6 +465,18 @@ class Pool(asyncio.AbstractServer):
         if self._closed:
             return
         self._closing = True
+        if self._housekeeping is not None:
+            self._housekeeping.cancel()
+            self._housekeeping = None
+        if self._sizer is not None:
+            self._sizer.detach()
+        if self._leak_detector is not None:
+            self._leak_detector.detach()
+        for fut in self._waiters.popall():
+            if not fut.done():
+                fut.set_exception(RuntimeError(
+                    "Cannot acquire connection after closing pool"
+                ))
 
     def terminate(self):
         # pragma: no cover
@@ -164,6 +488,10 @@ class Pool(asyncio.AbstractServer):
             conn.sync_close()
             self._terminated.add(conn)
         self._used.clear()
+        self._holders.clear()
+        self._in_use.clear()
+        self._key_of.clear()
+        self._key_in_use.clear()
 
     @asyncio.coroutine
     def wait_closed(self):
@@ -178,8 +506,11 @@ class Pool(asyncio.AbstractServer):
                 "after .close()"
             )
 
+        if self._close_hooks:
+            yield from self._run_close_hooks()
         while self._free:
             conn = self._free.popleft()
+            self._forget(conn)
             if not conn.closed:
                 yield from conn.close()
             else:
@@ -189,14 +520,89 @@ class Pool(asyncio.AbstractServer):
             while self.size > self.freesize:
                 yield from self._cond.wait()
         self._used.clear()
+        self._holders.clear()
+        self._in_use.clear()
+        self._key_of.clear()
+        self._key_in_use.clear()
+        self._created.clear()
+        self._idle_since.clear()
         self._closed = True
 
+    @property
+    def leak_detector(self):
+        """
+        绑定的 LeakDetector, 未配置时为 None
+        """
+        return self._leak_detector
+
+    @property
+    def slow_query_log(self):
+        """
+        slow_query_threshold 对应的 SlowQueryLog, 未配置时为 None
+        """
+        return self._slow_query_log
+
+    def add_listener(self, listener):
+        """
+        监听 pool 中所有连接 (包括之后创建的) 的语句事件
+        """
+        self._listeners.append(listener)
+        for conn in self._connections():
+            conn.add_listener(listener)
+
+    def remove_listener(self, listener):
+        """
+        移除监听
+        """
+        self._listeners.remove(listener)
+        for conn in self._connections():
+            if listener in conn._listeners:
+                conn.remove_listener(listener)
+
+    def _connections(self):
+        return list(self._free) + list(self._used)
+
+    def add_close_hook(self, hook):
+        """
+        wait_closed 关闭连接前调用 hook(conn) 协程,
+        conn 为空闲连接或临时创建的连接
+        """
+        self._close_hooks.append(hook)
+
+    def remove_close_hook(self, hook):
+        """
+        移除关闭钩子
+        """
+        self._close_hooks.remove(hook)
+
+    @asyncio.coroutine
+    def _run_close_hooks(self):
+        hooks, self._close_hooks = self._close_hooks, []
+        temporary = not self._free
+        if temporary:
+            conn = yield from self._connect()
+        else:
+            conn = self._free[0]
+        try:
+            for hook in hooks:
+                try:
+                    yield from hook(conn)
+                except Exception:
+                    logger.exception('pool close hook failed')
+        finally:
+            if temporary:
+                self._forget(conn)
+                yield from conn.close()
+
     def sync_close(self):
         """
         同步关闭
         """
         if self._closed:
             return
+        blocking.call('Pool.sync_close', self._sync_close)
+
+    def _sync_close(self):
         while self._free:
             conn = self._free.popleft()
             if not conn.closed:
@@ -208,71 +614,447 @@ class Pool(asyncio.AbstractServer):
                 conn.sync_close()
             self._terminated.add(conn)
         self._used.clear()
+        self._holders.clear()
+        self._in_use.clear()
+        self._key_of.clear()
+        self._key_in_use.clear()
         self._closed = True
 
-    def acquire(self):
+    def acquire(self, timeout=None, priority=0, key=None):
         """
         Acquire free connection from the pool.
+        Raise asyncio.TimeoutError after waiting *timeout* seconds
+        (default the pool acquire_timeout) and PoolOverloadedError when
+        max_waiters coroutines are already waiting.
+        Waiters with a higher *priority* are served first.
+        At most max_per_key connections are used by the same *key*,
+        waiters of different keys are served in turn.
         """
-        coro = self._acquire()
+        if timeout is None:
+            timeout = self._acquire_timeout
+        coro = self._acquire(timeout, priority, key)
         return _PoolAcquireContextManager(coro, self)
 
+    def _may_take(self, priority):
+        """
+        取走一个连接后是否仍能满足更高优先级的保留连接数
+        """
+        headroom = 0
+        for reserved_priority, count in self._reserved.items():
+            if reserved_priority > priority:
+                headroom += max(0, count - self._in_use[reserved_priority])
+        return self.freesize + self.maxsize - self.size > headroom
+
+    def _key_allowed(self, key):
+        """
+        key 是否还能再使用一个连接
+        """
+        return key is None or self._max_per_key is None or \
+            self._key_in_use[key] < self._max_per_key
+
+    def _pop_waiter(self):
+        return self._waiters.pop(
+            self._may_take if self._reserved else None,
+            self._key_allowed if self._max_per_key is not None else None
+        )
+
+    def _take(self, conn, priority, key=None, sample=True):
+        """
+        标记连接已被使用, 所有取出连接的路径都经过这里
+        sample 为 False 时由取得连接的协程自己记录调用栈
+        """
+        self._used.add(conn)
+        self._counters['acquires'] += 1
+        if self._leak_detector is not None:
+            self._leak_detector.checkout(conn, sample)
+        if self._reserved:
+            self._holders[conn] = priority
+            self._in_use[priority] += 1
+        if key is not None and self._max_per_key is not None:
+            self._key_of[conn] = key
+            self._key_in_use[key] += 1
+
+    def _unuse(self, conn):
+        """
+        标记连接不再被使用
+        """
+        self._used.discard(conn)
+        self._counters['releases'] += 1
+        if self._leak_detector is not None:
+            self._leak_detector.checkin(conn)
+        priority = self._holders.pop(conn, None)
+        if priority is not None:
+            self._in_use[priority] -= 1
+        key = self._key_of.pop(conn, None)
+        if key is not None:
+            self._key_in_use[key] -= 1
+            if not self._key_in_use[key]:
+                del self._key_in_use[key]
+
+    def _acquire_free(self, priority=0, key=None):
+        """
+        不加锁直接取出空闲连接, 没有空闲连接时返回 None
+        """
+        if self._reserved and not self._may_take(priority):
+            return None
+        if not self._key_allowed(key):
+            return None
+        while self._free and not self._closing:
+            conn = self._free.popleft()
+            assert not conn.closed, conn
+            assert conn not in self._used, (conn, self._used)
+            if self._max_lifetime is not None and self._expired(conn):
+                self._retire(conn, True)
+                continue
+            self._take(conn, priority, key)
+            return conn
+        return None
+
     @asyncio.coroutine
-    def _acquire(self):
+    def _acquire(self, timeout=None, priority=0, key=None):
         """
         pool 获得一个 conn
+        有空闲连接时不加锁直接返回, 否则按先进先出排队等待 release 直接交付
         """
         if self._closing:
             raise RuntimeError(
                 "Cannot acquire connection after closing pool"
             )
-        with (yield from self._cond):
-            while True:
-                yield from self._fill_free_pool(True)
-                if self._free:
-                    conn = self._free.popleft()
-                    assert not conn.closed, conn
-                    assert conn not in self._used, (conn, self._used)
-                    self._used.add(conn)
-                    return conn
+        start = self._loop.time()
+        conn = self._acquire_free(priority, key)
+        if conn is None:
+            try:
+                conn = yield from self._acquire_wait(
+                    start,
+                    timeout,
+                    priority,
+                    key
+                )
+            except asyncio.TimeoutError:
+                self._counters['acquire_timeouts'] += 1
+                raise
+            except PoolOverloadedError:
+                self._counters['acquire_rejected'] += 1
+                raise
+        wait_time = self._loop.time() - start
+        self._wait_times.add(wait_time)
+        self._wait_histogram.observe(wait_time)
+        reservoir = self._class_wait_times.get(priority)
+        if reservoir is None:
+            reservoir = self._class_wait_times[priority] = Reservoir()
+        reservoir.add(wait_time)
+        return conn
+
+    @asyncio.coroutine
+    def _acquire_wait(self, start, timeout, priority, key):
+        """
+        创建新连接或排队等待
+        """
+        if self._key_allowed(key):
+            # 已有同级或更高优先级的等待者时不插队
+            fill = not self._waiters.waiting(
+                priority,
+                self._key_allowed if self._max_per_key is not None else None
+            )
+        elif self._quota_policy == 'fail':
+            self._quota_rejected[key] += 1
+            raise PoolQuotaExceededError(
+                "Too many connections used by %r "
+                "(max_per_key=%d)" % (key, self._max_per_key)
+            )
+        else:
+            self._quota_queued[key] += 1
+            fill = False
+        retry = False
+        while True:
+            if fill:
+                if timeout is None:
+                    yield from self._fill()
                 else:
-                    yield from self._cond.wait()
+                    # 创建连接也计入 acquire 的超时
+                    yield from asyncio.wait_for(
+                        self._fill(),
+                        max(start + timeout - self._loop.time(), 0),
+                        loop=self._loop
+                    )
+                conn = self._acquire_free(priority, key)
+                if conn is not None:
+                    return conn
+            if not retry and self._max_waiters is not None and \
+                    len(self._waiters) >= self._max_waiters:
+                raise PoolOverloadedError(
+                    "Too many coroutines waiting for a connection "
+                    "(max_waiters=%d)" % self._max_waiters
+                )
+            fut = create_future(self._loop)
+            self._waiters.append(fut, priority, retry, key)
+            handle = None
+            if timeout is not None:
+                handle = self._loop.call_at(
+                    start + timeout,
+                    self._timeout_waiter,
+                    fut
+                )
+            try:
+                conn = yield from fut
+            except BaseException:
+                self._cancel_waiter(fut, priority, key)
+                raise
+            finally:
+                if handle is not None:
+                    handle.cancel()
+            if conn is not None:
+                if self._leak_detector is not None:
+                    self._leak_detector.sample(conn)
+                return conn
+            # 被唤醒但没有连接: 有连接被关闭, 由队首重新创建
+            fill = retry = True
+
+    @asyncio.coroutine
+    def _fill(self):
+        with (yield from self._cond):
+            yield from self._fill_free_pool(True)
+
+    @staticmethod
+    def _timeout_waiter(fut):
+        """
+        等待超时
+        """
+        if not fut.done():
+            fut.set_exception(asyncio.TimeoutError())
+
+    def _cancel_waiter(self, fut, priority=0, key=None):
+        """
+        等待被取消, 已交付的连接转交给下一个等待者
+        """
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            conn = fut.result()
+            if conn is not None:
+                self._unuse(conn)
+                self._release_free(conn)
+            else:
+                self._wakeup_waiter()
+        else:
+            try:
+                self._waiters.remove(fut, priority, key)
+            except ValueError:
+                # pragma: no cover
+                pass
+
+    def _release_free(self, conn):
+        """
+        把连接直接交付给优先级最高的等待者, 没有等待者时放回空闲队列
+        """
+        fut, priority, key = self._pop_waiter()
+        if fut is not None:
+            # 调用栈在等待者的协程中记录
+            self._take(conn, priority, key, False)
+            fut.set_result(conn)
+        else:
+            self._put_free(conn)
+
+    def _wakeup_waiter(self):
+        """
+        连接数减少时唤醒优先级最高的等待者去创建新连接
+        """
+        fut = self._pop_waiter()[0]
+        if fut is not None:
+            fut.set_result(None)
 
     @asyncio.coroutine
     def _fill_free_pool(self, override_min):
         """
         iterate over free connections and remove timeouted ones
         """
-        while self.size < self.minsize:
-            self._acquiring += 1
-            try:
-                conn = yield from connect(
-                    database=self._database,
-                    echo=self._echo,
-                    loop=self._loop,
-                    **self._conn_kwargs
-                )
-                self._free.append(conn)
-                self._cond.notify()
-            finally:
-                self._acquiring -= 1
+        if self.size < self.minsize:
+            yield from self._open_many(self.minsize - self.size)
         if self._free:
             return
 
         if override_min and self.size < self.maxsize:
             self._acquiring += 1
             try:
-                conn = yield from connect(
-                    database=self._database,
-                    echo=self._echo,
-                    loop=self._loop,
-                    **self._conn_kwargs
-                )
-                self._free.append(conn)
+                conn = yield from self._connect()
+                self._put_free(conn)
                 self._cond.notify()
             finally:
                 self._acquiring -= 1
 
+    @asyncio.coroutine
+    def _open_many(self, count):
+        """
+        并发创建 count 个连接放入空闲队列, 有失败时抛出第一个异常
+        """
+        self._acquiring += count
+        try:
+            results = yield from asyncio.gather(
+                *[self._connect() for _ in range(count)],
+                loop=self._loop,
+                return_exceptions=True
+            )
+        finally:
+            self._acquiring -= count
+        error = None
+        for result in results:
+            if isinstance(result, BaseException):
+                error = error or result
+            else:
+                self._put_free(result)
+                self._cond.notify()
+        if error is not None:
+            raise error
+
+    @asyncio.coroutine
+    def _connect(self):
+        """
+        创建一个新连接并记录创建时间
+        """
+        try:
+            conn = yield from connect(
+                database=self._database,
+                echo=self._echo,
+                loop=self._loop,
+                **self._conn_kwargs
+            )
+        except Exception:
+            self._counters['connect_errors'] += 1
+            raise
+        self._counters['connects'] += 1
+        self._created[conn] = self._loop.time()
+        for listener in self._listeners:
+            conn.add_listener(listener)
+        return conn
+
+    def _put_free(self, conn):
+        """
+        放回空闲队列
+        """
+        if self._max_idle is not None:
+            self._idle_since[conn] = self._loop.time()
+        self._free.append(conn)
+
+    def _forget(self, conn):
+        """
+        不再跟踪该连接
+        """
+        if self._created.pop(conn, None) is not None:
+            self._counters['closes'] += 1
+        self._idle_since.pop(conn, None)
+
+    def _expired(self, conn, now=None):
+        """
+        连接是否超过 max_lifetime 或 max_queries
+        """
+        if self._max_queries is not None and \
+                conn.query_count >= self._max_queries:
+            return True
+        if self._max_lifetime is not None:
+            if now is None:
+                now = self._loop.time()
+            created = self._created.get(conn, now)
+            return now - created >= self._max_lifetime
+        return False
+
+    def _retire(self, conn, replace):
+        """
+        在后台关闭连接, replace 时同时创建一个新连接补位
+        """
+        self._forget(conn)
+        if replace and not self._closing:
+            # 补位连接计入 size, 避免其它 acquire 额外创建
+            self._acquiring += 1
+        else:
+            replace = False
+        self._spawn(self._recycle(conn, replace))
+
+    def _spawn(self, coro):
+        """
+        启动后台任务并保存引用
+        """
+        task = create_task(coro, self._loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @asyncio.coroutine
+    def _recycle(self, conn, replace):
+        """
+        关闭旧连接, replace 时再创建一个新连接
+        """
+        try:
+            yield from conn.close()
+        except Exception:
+            # pragma: no cover
+            logger.exception('close expired connection failed')
+        if replace:
+            yield from self._open_free()
+
+    def _grow(self, count):
+        """
+        在后台预先创建 count 个连接 (不超过 maxsize)
+        """
+        count = min(count, self.maxsize - self.size)
+        for _ in range(max(count, 0)):
+            self._acquiring += 1
+            self._spawn(self._open_free())
+        return max(count, 0)
+
+    def _shrink(self, count):
+        """
+        关闭最久空闲的 count 个连接 (不低于 minsize)
+        """
+        closed = 0
+        while closed < count and self._free and self.size > self.minsize:
+            conn = self._free.popleft()
+            self._retire(conn, False)
+            closed += 1
+        return closed
+
+    @asyncio.coroutine
+    def _open_free(self):
+        """
+        创建新连接交给等待者或放回空闲队列, 调用前已计入 _acquiring
+        """
+        try:
+            conn = yield from self._connect()
+        except Exception:
+            self._acquiring -= 1
+            logger.exception('open pool connection failed')
+            self._wakeup_waiter()
+            if self._closing:
+                yield from self._wakeup()
+            return
+        self._acquiring -= 1
+        if self._closing:
+            self._forget(conn)
+            yield from conn.close()
+            yield from self._wakeup()
+        else:
+            self._release_free(conn)
+
+    def _schedule_housekeeping(self):
+        self._housekeeping = self._loop.call_later(
+            self._housekeeping_interval,
+            self._housekeep
+        )
+
+    def _housekeep(self):
+        """
+        定时回收空闲队列中过期或空闲过久的连接
+        """
+        now = self._loop.time()
+        max_idle = self._max_idle
+        for conn in list(self._free):
+            if self._expired(conn, now):
+                self._free.remove(conn)
+                self._retire(conn, True)
+            elif max_idle is not None and self.size > self.minsize and \
+                    now - self._idle_since.get(conn, now) >= max_idle:
+                # 空闲回收只收缩到 minsize
+                self._free.remove(conn)
+                self._retire(conn, False)
+        self._schedule_housekeeping()
+
     @asyncio.coroutine
     def _wakeup(self):
         """
@@ -287,12 +1069,59 @@ class Pool(asyncio.AbstractServer):
         Release free connection back to the connection pool.
         """
         assert conn in self._used, (conn, self._used)
-        self._used.remove(conn)
-        if not conn.closed:
+        if self._need_reset(conn):
+            # 重置期间仍计入已使用, release 立即返回
+            self._spawn(self._reset_release(conn))
+            return
+        self._unuse(conn)
+        if conn.closed:
+            self._forget(conn)
+            self._wakeup_waiter()
+        elif self._closing:
+            self._forget(conn)
+            yield from conn.close()
+        elif self._expired(conn):
+            self._retire(conn, True)
+        else:
+            self._release_free(conn)
+        if self._closing:
+            yield from self._wakeup()
+
+    def _need_reset(self, conn):
+        """
+        放回前是否需要在后台重置连接
+        """
+        if not self._reset_on_release or conn.closed or self._closing:
+            return False
+        if self._expired(conn):
+            return False
+        return self._ping_on_release or conn.dirty
+
+    @asyncio.coroutine
+    def _reset_release(self, conn):
+        """
+        重置连接状态后放回, 失败时关闭该连接
+        """
+        try:
+            yield from conn.reset(self._ping_on_release)
+        except Exception:
+            logger.warning('reset connection failed, close it', exc_info=True)
+            self._unuse(conn)
+            self._forget(conn)
+            try:
+                yield from conn.close()
+            except Exception:
+                # pragma: no cover
+                conn.sync_close()
+            self._wakeup_waiter()
+        else:
+            self._unuse(conn)
             if self._closing:
+                self._forget(conn)
                 yield from conn.close()
             else:
-                self._free.append(conn)
+                self._release_free(conn)
+        if self._closing:
             yield from self._wakeup()
 
     def __del__(self):
@@ -0,0 +1,199 @@
+"""
+prometheus 文本格式 (0.0.4) 的指标输出, 不依赖 prometheus_client
+"""
+import sqlite3
+
+from .metrics import DEFAULT_BUCKETS, Histogram
+
+__all__ = ['PrometheusCollector', 'render']
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_POOL_GAUGES = (
+    ('pool_size', 'Connections opened or being opened by the pool.', 'size'),
+    ('pool_free', 'Idle connections in the pool.', 'freesize'),
+    ('pool_max_size', 'Maximum number of pool connections.', 'maxsize'),
+    ('pool_waiters', 'Coroutines waiting for a connection.', 'waiters'),
+)
+
+_POOL_COUNTERS = (
+    ('pool_acquires_total', 'Connections handed out.', 'acquires'),
+    (
+        'pool_acquire_timeouts_total',
+        'Acquires that timed out.',
+        'acquire_timeouts'
+    ),
+    (
+        'pool_acquire_rejected_total',
+        'Acquires rejected by max_waiters or max_per_key.',
+        'acquire_rejected'
+    ),
+    ('pool_releases_total', 'Connections released.', 'releases'),
+    ('pool_connections_opened_total', 'Connections opened.', 'connects'),
+    (
+        'pool_connection_errors_total',
+        'Failed attempts to open a connection.',
+        'connect_errors'
+    ),
+    ('pool_connections_closed_total', 'Connections closed.', 'closes'),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n') \
+        .replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, _escape(value))
+        for name, value in sorted(labels.items())
+    )
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+def _is_busy(error):
+    """
+    sqlite 的 SQLITE_BUSY / SQLITE_LOCKED 错误
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+class PrometheusCollector:
+    """
+    收集 target (Pool 或 Connection) 的指标
+    Pool: 连接数, 等待者, acquire 等待直方图与累计计数
+    两者: 通过语句事件监听统计语句耗时直方图, 失败与 busy 错误数
+    labels 附加到所有样本上, 用于区分多个 pool
+    """
+
+    def __init__(
+            self,
+            target,
+            namespace='aiosqlite3',
+            labels=None,
+            buckets=DEFAULT_BUCKETS
+    ):
+        self._target = target
+        self._namespace = namespace
+        self._labels = dict(labels or {})
+        self._statements = Histogram(buckets)
+        self._errors = 0
+        self._busy_errors = 0
+        target.add_listener(self._on_statement)
+
+    def _on_statement(self, event):
+        self._statements.observe(event.duration)
+        if event.error is not None:
+            self._errors += 1
+            if _is_busy(event.error):
+                self._busy_errors += 1
+
+    def close(self):
+        """
+        停止统计语句事件
+        """
+        self._target.remove_listener(self._on_statement)
+
+    def collect(self):
+        """
+        [(指标名, 类型, 说明, [(名称后缀, labels, 值), ...]), ...]
+        """
+        labels = self._labels
+        families = []
+        target = self._target
+        if hasattr(target, 'counters'):
+            for name, doc, attr in _POOL_GAUGES:
+                families.append((name, 'gauge', doc, [
+                    ('', labels, getattr(target, attr))
+                ]))
+            families.append(('pool_in_use', 'gauge', 'Connections in use.', [
+                ('', labels, len(target._used))
+            ]))
+            counters = target.counters
+            for name, doc, key in _POOL_COUNTERS:
+                families.append((name, 'counter', doc, [
+                    ('', labels, counters.get(key, 0))
+                ]))
+            families.append((
+                'pool_acquire_wait_seconds',
+                'histogram',
+                'Time spent waiting for a pool connection.',
+                self._histogram_samples(target.wait_histogram)
+            ))
+        families.append((
+            'statement_duration_seconds',
+            'histogram',
+            'Statement latency including queueing and fetching.',
+            self._histogram_samples(self._statements)
+        ))
+        families.append((
+            'statement_errors_total',
+            'counter',
+            'Statements that raised an error.',
+            [('', labels, self._errors)]
+        ))
+        families.append((
+            'statement_busy_errors_total',
+            'counter',
+            'Statements that failed with database is locked or busy.',
+            [('', labels, self._busy_errors)]
+        ))
+        return [
+            (self._namespace + '_' + name, kind, doc, samples)
+            for name, kind, doc, samples in families
+        ]
+
+    def _histogram_samples(self, histogram):
+        samples = []
+        for bound, count in histogram.cumulative():
+            bucket_labels = dict(self._labels)
+            bucket_labels['le'] = _format_value(float(bound))
+            samples.append(('_bucket', bucket_labels, count))
+        samples.append(('_sum', self._labels, histogram.total))
+        samples.append(('_count', self._labels, histogram.count))
+        return samples
+
+    def render(self):
+        """
+        prometheus 文本格式
+        """
+        return render([self])
+
+
+def render(collectors):
+    """
+    合并多个 collector 的指标为 prometheus 文本格式,
+    同名指标只输出一次 HELP/TYPE
+    """
+    families = {}
+    order = []
+    for collector in collectors:
+        for name, kind, doc, samples in collector.collect():
+            if name not in families:
+                families[name] = (kind, doc, [])
+                order.append(name)
+            families[name][2].extend(samples)
+    lines = []
+    for name in order:
+        kind, doc, samples = families[name]
+        lines.append('# HELP %s %s' % (name, doc))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for suffix, labels, value in samples:
+            lines.append('%s%s%s %s' % (
+                name,
+                suffix,
+                _format_labels(labels),
+                _format_value(value)
+            ))
+    return '\n'.join(lines) + '\n'
@@ -1,6 +1,7 @@
 """Optional support for sqlalchemy.sql dynamic query generation."""
 from .connection import SAConnection
 from .engine import create_engine, Engine
+from .loader import table_loader
 from .exc import (Error, ArgumentError, InvalidRequestError,
                   NoSuchColumnError, ResourceClosedError)
 
@@ -13,7 +14,8 @@ __all__ = (
     'InvalidRequestError',
     'NoSuchColumnError',
     'ResourceClosedError',
-    'Engine'
+    'Engine',
+    'table_loader'
 )
 
 (
@@ -24,5 +26,6 @@ __all__ = (
     NoSuchColumnError,
     ResourceClosedError,
     create_engine,
-    Engine
+    Engine,
+    table_loader
 )
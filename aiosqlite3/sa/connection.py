@@ -1,6 +1,7 @@
 # ported from:
 # https://github.com/aio-libs/aiopg/blob/master/aiopg/sa/connection.py
 import asyncio
+import functools
 import weakref
 
 from sqlalchemy.sql import ClauseElement
@@ -8,7 +9,8 @@ from sqlalchemy.sql.dml import UpdateBase
 from sqlalchemy.sql.ddl import DDLElement
 
 from . import exc
-from .result import create_result_proxy
+from ..cursor import Cursor
+from .result import create_result_proxy, _BufferedCursor
 from .transaction import (
     RootTransaction,
     Transaction,
@@ -16,6 +18,7 @@ from .transaction import (
 )
 from ..utils import (
     PY_35,
+    SQLITE_MAX_VARIABLE_NUMBER,
     _TransactionContextManager,
     _SAConnectionContextManager
 )
@@ -27,6 +30,7 @@ class SAConnection:
         self._connection = connection
         self._transaction = None
         self._savepoint_seq = 0
+        self._pending_savepoints = []
         self._weak_results = weakref.WeakSet()
         self._engine = engine
         self._dialect = engine.dialect
@@ -71,6 +75,35 @@ class SAConnection:
         return _SAConnectionContextManager(coro)
 
     def _base_params(self, query, dp, compiled, is_update):
+        dp = self._positional_params(query, dp, is_update)
+        compiled_params = compiled.construct_params(dp)
+        params = [self._process_params(
+            compiled_params,
+            compiled._bind_processors
+        )]
+        processed_params = self._dialect.execute_sequence_format(params)
+        return processed_params[0]
+
+    def _base_many_params(self, query, dps, compiled, is_update):
+        construct_many = getattr(compiled, 'construct_params_many', None)
+        if construct_many is None:
+            # pragma: no cover
+            return [self._base_params(
+                query,
+                dp,
+                compiled,
+                is_update,
+            ) for dp in dps]
+        dps = [self._positional_params(query, dp, is_update) for dp in dps]
+        processors = compiled._bind_processors
+        params = [
+            self._process_params(compiled_params, processors)
+            for compiled_params in construct_many(dps)
+        ]
+        return self._dialect.execute_sequence_format(params)
+
+    @staticmethod
+    def _positional_params(query, dp, is_update):
         if dp and isinstance(dp, (list, tuple)):
             if is_update:
                 dp = {c.key: pval for c, pval in zip(query.table.c, dp)}
@@ -81,17 +114,19 @@ class SAConnection:
                     "clause with positional "
                     "parameters"
                 )
-        compiled_params = compiled.construct_params(dp)
-        processors = compiled._bind_processors
-        params = [{
+        return dp
+
+    @staticmethod
+    def _process_params(compiled_params, processors):
+        if not processors:
+            return compiled_params
+        return {
             key: (
                 processors[key](compiled_params[key])
                 if key in processors else compiled_params[key]
             )
             for key in compiled_params
-        }]
-        processed_params = self._dialect.execute_sequence_format(params)
-        return processed_params[0]
+        }
 
     @asyncio.coroutine
     def _executemany(self, query, dps, cursor):
@@ -106,13 +141,15 @@ class SAConnection:
         elif isinstance(query, ClauseElement):
             compiled = query.compile(dialect=self._dialect)
             is_update = isinstance(query, UpdateBase)
-            params = [self._base_params(
-                query,
-                dp,
-                compiled,
-                is_update,
-            ) for dp in dps]
-            yield from cursor.executemany(str(compiled), params)
+            params = self._base_many_params(query, dps, compiled, is_update)
+            if is_update and query._returning:
+                rows = yield from cursor.executemany_returning(
+                    str(compiled),
+                    params
+                )
+                cursor = _BufferedCursor(cursor, rows)
+            else:
+                yield from cursor.executemany(str(compiled), params)
             result_map = compiled._result_columns
         else:
             raise exc.ArgumentError(
@@ -134,7 +171,7 @@ class SAConnection:
         """
         execute or executemany
         """
-        cursor = yield from self._connection.cursor()
+        cursor = yield from self._cursor()
         dp = _distill_params(multiparams, params)
         if len(dp) > 1:
             return (yield from self._executemany(query, dp, cursor))
@@ -178,6 +215,100 @@ class SAConnection:
         self._weak_results.add(ret)
         return ret
 
+    @asyncio.coroutine
+    def _cursor(self):
+        """
+        Create a cursor, emitting deferred savepoints in the same hop.
+        """
+        if not self._pending_savepoints:
+            return (yield from self._connection.cursor())
+        names = list(self._pending_savepoints)
+        emitted = []
+        native = self._connection.native_connection
+
+        def go():
+            for name in names:
+                native.execute('SAVEPOINT ' + name)
+                emitted.append(name)
+            return native.cursor()
+        try:
+            cursor = yield from self._connection.async_execute(go)
+        finally:
+            # 只有已成功创建的 savepoint 才不再延迟
+            del self._pending_savepoints[:len(emitted)]
+        return Cursor(cursor, self._connection, self._connection.echo)
+
+    @asyncio.coroutine
+    def _execute_savepoint_sql(self, sql):
+        native = self._connection.native_connection
+
+        def go():
+            native.execute(sql).close()
+        yield from self._connection.async_execute(go)
+
+    @asyncio.coroutine
+    def bulk_insert(self, table, rows, chunk_rows=None):
+        """Insert *rows* (dicts sharing the same keys) into *table*
+        with multi-row ``INSERT ... VALUES (...), (...)`` statements.
+
+        Rows are sent in chunks of *chunk_rows*, by default as many
+        rows as fit in SQLITE_MAX_VARIABLE_NUMBER bound parameters.
+        All chunks run inside one transaction: the current one if the
+        connection is already in a transaction, otherwise a new one that
+        is committed on success and rolled back on error.
+
+        Returns the number of inserted rows.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        keys = rows[0].keys()
+        for row in rows:
+            if row.keys() != keys:
+                raise exc.ArgumentError(
+                    "bulk_insert rows should have the same keys"
+                )
+        keys = tuple(keys)
+        if chunk_rows is None:
+            compiled = _compile_bulk_insert(self._dialect, table, keys, 1)
+            chunk_rows = max(
+                1,
+                SQLITE_MAX_VARIABLE_NUMBER // len(compiled.bind_names)
+            )
+
+        trans = None
+        if not self.in_transaction and not self._connection.in_transaction:
+            trans = yield from self._begin()
+        rowcount = 0
+        try:
+            cursor = yield from self._cursor()
+            try:
+                for start in range(0, len(rows), chunk_rows):
+                    chunk = rows[start:start + chunk_rows]
+                    compiled = _compile_bulk_insert(
+                        self._dialect,
+                        table,
+                        keys,
+                        len(chunk)
+                    )
+                    dp = {
+                        '%s_m%d' % (key, index): row[key]
+                        for index, row in enumerate(chunk)
+                        for key in keys
+                    }
+                    params = self._base_params(None, dp, compiled, False)
+                    yield from cursor.execute(compiled.string, params)
+                    rowcount += cursor.rowcount
+            finally:
+                yield from cursor.close()
+        except BaseException:
+            if trans is not None:
+                yield from trans.rollback()
+            raise
+        if trans is not None:
+            yield from trans.commit()
+        return rowcount
+
     @asyncio.coroutine
     def scalar(self, query, *multiparams, **params):
         """
@@ -247,6 +378,7 @@ class SAConnection:
 
     @asyncio.coroutine
     def _commit_impl(self):
+        del self._pending_savepoints[:]
         try:
             yield from self._connection.commit()
         finally:
@@ -254,6 +386,7 @@ class SAConnection:
 
     @asyncio.coroutine
     def _rollback_impl(self):
+        del self._pending_savepoints[:]
         try:
             yield from self._connection.rollback()
         finally:
@@ -281,32 +414,38 @@ class SAConnection:
 
     @asyncio.coroutine
     def _savepoint_impl(self, name=None):
+        """SAVEPOINT is deferred until the next statement on this
+        connection, so a savepoint that is never used costs nothing."""
         self._savepoint_seq += 1
         name = 'aiosqlite3_sa_savepoint_%s' % self._savepoint_seq
-
-        cur = yield from self._connection.cursor()
-        try:
-            yield from cur.execute('SAVEPOINT ' + name)
-            return name
-        finally:
-            yield from cur.close()
+        self._pending_savepoints.append(name)
+        return name
+
+    def _discard_pending_savepoint(self, name):
+        """Drop *name* and every savepoint after it when they have not
+        been emitted yet, returns True if *name* was pending."""
+        pending = self._pending_savepoints
+        if name in pending:
+            del pending[pending.index(name):]
+            return True
+        # pending savepoints are always nested inside emitted ones
+        del pending[:]
+        return False
 
     @asyncio.coroutine
     def _rollback_to_savepoint_impl(self, name, parent):
-        cur = yield from self._connection.cursor()
-        try:
-            yield from cur.execute('ROLLBACK TO SAVEPOINT ' + name)
-        finally:
-            yield from cur.close()
+        if not self._discard_pending_savepoint(name):
+            yield from self._execute_savepoint_sql(
+                'ROLLBACK TO SAVEPOINT ' + name
+            )
         self._transaction = parent
 
     @asyncio.coroutine
     def _release_savepoint_impl(self, name, parent):
-        cur = yield from self._connection.cursor()
-        try:
-            yield from cur.execute('RELEASE SAVEPOINT ' + name)
-        finally:
-            yield from cur.close()
+        if not self._discard_pending_savepoint(name):
+            yield from self._execute_savepoint_sql(
+                'RELEASE SAVEPOINT ' + name
+            )
         self._transaction = parent
 
     @property
@@ -364,6 +503,16 @@ class SAConnection:
         pass
 
 
+@functools.lru_cache(maxsize=128)
+def _compile_bulk_insert(dialect, table, keys, rows):
+    """
+    Compile (and cache) a *rows* rows INSERT for bulk_insert, the bind
+    parameters are named ``<key>_m<row index>``.
+    """
+    query = table.insert().values([dict.fromkeys(keys)] * rows)
+    return query.compile(dialect=dialect)
+
+
 def _distill_params(multiparams, params):
     """Given arguments from the calling form *multiparams, **params,
     return a list of bind parameter structures, usually a list of
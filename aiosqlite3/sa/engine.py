@@ -2,7 +2,11 @@
 # https://github.com/aio-libs/aiopg/blob/master/aiopg/sa/engine.py
 import asyncio
 import json
+import sqlite3
 import aiosqlite3
+from sqlalchemy.exc import CompileError
+from sqlalchemy.sql import expression
+from sqlalchemy.util import memoized_property
 from .connection import SAConnection
 from .exc import InvalidRequestError
 from ..utils import PY_35, _PoolContextManager, _PoolAcquireContextManager
@@ -13,6 +17,16 @@ try:
 except ImportError:  # pragma: no cover
     raise ImportError('aiosqlite.sa requires sqlalchemy')
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
 # see https://www.python.org/dev/peps/pep-0249/#paramstyle
 # paramstyle  Meaning
 # qmark       Question mark style, e.g. ...WHERE name=?
@@ -37,17 +51,64 @@ class ACompiler_sqlite(SQLiteCompiler):
             _group_number,
             _check
         )
-        for column in self.prefetch:
-            compiler_params[column.key] = self._exec_default(
-                column.default
-            )
+        scalars, callables = self._prefetch_defaults
+        if scalars:
+            compiler_params.update(scalars)
+        for key, func in callables:
+            compiler_params[key] = func(self.dialect)
         return compiler_params
 
-    def _exec_default(self, default):
-        if default.is_callable:
-            return default.arg(self.dialect)
-        else:
-            return default.arg
+    def construct_params_many(self, multiparams):
+        """
+        executemany 的参数构建, 标量默认值批量写入所有行
+        """
+        construct = super().construct_params
+        rows = [
+            construct(params, _group_number=index)
+            for index, params in enumerate(multiparams, 1)
+        ]
+        scalars, callables = self._prefetch_defaults
+        if scalars:
+            for row in rows:
+                row.update(scalars)
+        if callables:
+            dialect = self.dialect
+            for row in rows:
+                for key, func in callables:
+                    row[key] = func(dialect)
+        return rows
+
+    def returning_clause(self, stmt, returning_cols):
+        """
+        SQLite 3.35+ 支持 RETURNING
+        """
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            # pragma: no cover
+            raise CompileError(
+                "RETURNING requires SQLite 3.35.0 or later, "
+                "found %s" % sqlite3.sqlite_version
+            )
+        columns = [
+            self._label_select_column(None, c, True, False, {})
+            for c in expression._select_iterables(returning_cols)
+        ]
+        return 'RETURNING ' + ', '.join(columns)
+
+    @memoized_property
+    def _prefetch_defaults(self):
+        """
+        每个编译语句只计算一次 prefetch 列的默认值:
+        (标量字典, [(key, callable), ...])
+        """
+        scalars = {}
+        callables = []
+        for column in self.prefetch:
+            default = column.default
+            if default.is_callable:
+                callables.append((column.key, default.arg))
+            else:
+                scalars[column.key] = default.arg
+        return scalars, callables
 
 
 def json_deserializer(x):
@@ -55,13 +116,53 @@ def json_deserializer(x):
     return x
 
 
-def compiler_dialect(paramstyle='named'):
+_json_passthrough = json_deserializer
+
+
+# 默认使用标准库 json, 写入的文本与是否安装第三方库无关
+json_dumps = json.dumps
+json_loads = json.loads
+
+# orjson/msgspec 需要通过 json_serializer=/json_deserializer= 显式启用,
+# 与 json.dumps 的差异: 输出紧凑 (无空格), NaN/Infinity 写为 null (orjson)
+# 或抛出异常 (msgspec), 非 str 的 dict key 由 orjson 转为字符串
+if orjson is not None:
+    def orjson_dumps(obj):
+        """
+        orjson 序列化, sqlite 需要 str, 允许非 str 的 dict key
+        """
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    orjson_loads = orjson.loads
+else:  # pragma: no cover
+    orjson_dumps = orjson_loads = None
+
+if msgspec is not None:  # pragma: no cover
+    def msgspec_dumps(obj):
+        """
+        msgspec 序列化, sqlite 需要 str
+        """
+        return msgspec.json.encode(obj).decode()
+
+    msgspec_loads = msgspec.json.decode
+else:  # pragma: no cover
+    msgspec_dumps = msgspec_loads = None
+
+
+def compiler_dialect(
+        paramstyle='named',
+        json_serializer=None,
+        json_deserializer=None
+):
     """
     构建dialect
+
+    json_serializer 默认为 json.dumps, 可传入 orjson_dumps/msgspec_dumps,
+    json_deserializer 默认原样返回, 需要解码时可传入 json_loads.
     """
     dialect = SQLiteDialect_pysqlite(
-        json_serializer=json.dumps,
-        json_deserializer=json_deserializer,
+        json_serializer=json_serializer or json_dumps,
+        json_deserializer=json_deserializer or _json_passthrough,
         paramstyle=paramstyle
     )
     dialect.default_paramstyle = paramstyle
@@ -79,6 +180,8 @@ def create_engine(
         loop=None,
         dialect=_dialect,
         paramstyle=None,
+        json_serializer=None,
+        json_deserializer=None,
         **kwargs):
     """
     A coroutine for Engine creation.
@@ -86,6 +189,12 @@ def create_engine(
     Returns Engine instance with embedded connection pool.
 
     The pool has *minsize* opened connections to sqlite3.
+
+    *json_serializer*/*json_deserializer* replace the callables used
+    for JSON columns, e.g. ``json_deserializer=engine.json_loads``.
+    The default serializer is ``json.dumps``; ``engine.orjson_dumps`` or
+    ``engine.msgspec_dumps`` (None when the package is not installed)
+    are faster but format some values differently.
     """
     coro = _create_engine(
         database=database,
@@ -94,6 +203,8 @@ def create_engine(
         loop=loop,
         dialect=dialect,
         paramstyle=paramstyle,
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
         **kwargs
     )
     return _EngineContextManager(coro)
@@ -107,6 +218,8 @@ def _create_engine(
         loop=None,
         dialect=_dialect,
         paramstyle=None,
+        json_serializer=None,
+        json_deserializer=None,
         **kwargs):
     if loop is None:
         # pragma: no cover
@@ -120,7 +233,14 @@ def _create_engine(
     )
     conn = yield from pool.acquire()
     try:
-        return Engine(dialect, pool, paramstyle=paramstyle, **kwargs)
+        return Engine(
+            dialect,
+            pool,
+            paramstyle=paramstyle,
+            json_serializer=json_serializer,
+            json_deserializer=json_deserializer,
+            **kwargs
+        )
     finally:
         # pass
         yield from pool.release(conn)
@@ -136,10 +256,20 @@ class Engine:
     create_engine coroutine.
     """
 
-    def __init__(self, dialect=_dialect, pool=None, paramstyle=None, **kwargs):
-        if paramstyle:
-            # pragma: no cover
-            dialect = compiler_dialect(paramstyle)
+    def __init__(
+            self,
+            dialect=_dialect,
+            pool=None,
+            paramstyle=None,
+            json_serializer=None,
+            json_deserializer=None,
+            **kwargs):
+        if paramstyle or json_serializer or json_deserializer:
+            dialect = compiler_dialect(
+                paramstyle or dialect.paramstyle,
+                json_serializer=json_serializer,
+                json_deserializer=json_deserializer
+            )
         self._dialect = dialect
         self._pool = pool
         self._conn_kw = kwargs
@@ -221,6 +351,46 @@ class Engine:
         res = yield from self._pool.release(raw)
         return res
 
+    @asyncio.coroutine
+    def execute(self, query, *multiparams, **params):
+        """Executes a SQL query on a connection borrowed from the pool
+        for this statement only.
+
+        Rows are fetched before the connection goes back to the pool,
+        and a transaction implicitly opened by the statement is
+        committed (or rolled back on error).
+
+        Returns ResultProxy instance with results of SQL query
+        execution.
+        """
+        conn = yield from self._acquire()
+        raw = conn.connection
+        try:
+            try:
+                result = yield from conn._execute(
+                    query,
+                    *multiparams,
+                    **params
+                )
+                yield from result._buffer()
+            except BaseException:
+                if raw.in_transaction:
+                    yield from raw.rollback()
+                raise
+            if raw.in_transaction:
+                yield from raw.commit()
+        finally:
+            yield from self.release(conn)
+        return result
+
+    @asyncio.coroutine
+    def scalar(self, query, *multiparams, **params):
+        """
+        Executes a SQL query and returns a scalar value.
+        """
+        res = yield from self.execute(query, *multiparams, **params)
+        return (yield from res.scalar())
+
     def __enter__(self):
         raise RuntimeError(
             '"yield from" should be used as context manager expression'
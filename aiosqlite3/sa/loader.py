@@ -0,0 +1,43 @@
+"""DataLoader-style batching of point lookups for SAConnection and Engine."""
+import asyncio
+
+from sqlalchemy.sql import select
+
+from ..loader import Loader
+from ..utils import SQLITE_MAX_VARIABLE_NUMBER
+
+
+def table_loader(
+        conn,
+        table,
+        key_column,
+        many=False,
+        max_batch=SQLITE_MAX_VARIABLE_NUMBER,
+        loop=None
+):
+    """Return a Loader fetching rows of *table* by *key_column*.
+
+    *conn* is an SAConnection or an Engine. Keys collected in one loop
+    tick are fetched with a single ``WHERE key_column IN (...)`` query.
+    With *many* each key resolves to a list of rows.
+    """
+    if isinstance(key_column, str):
+        key_column = table.c[key_column]
+
+    @asyncio.coroutine
+    def batch_fn(keys):
+        query = select([table]).where(key_column.in_(keys))
+        res = yield from conn.execute(query)
+        rows = yield from res.fetchall()
+        values = {}
+        for row in rows:
+            if many:
+                values.setdefault(row[key_column], []).append(row)
+            else:
+                values[row[key_column]] = row
+        if many:
+            for key in keys:
+                values.setdefault(key, [])
+        return values
+
+    return Loader(batch_fn, loop=loop, max_batch=max_batch)
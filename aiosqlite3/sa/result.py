@@ -2,6 +2,7 @@
 # https://github.com/aio-libs/aiopg/blob/master/aiopg/sa/result.py
 
 import asyncio
+import collections
 import weakref
 from collections.abc import Mapping, Sequence
 from sqlalchemy.sql import expression, sqltypes
@@ -17,6 +18,48 @@ def create_result_proxy(connection, cursor, dialect, result_map):
     return result_proxy
 
 
+class _BufferedCursor:
+    """Cursor-like object serving rows that were already fetched on
+    the worker thread, *cursor* is the aiosqlite3 Cursor that produced
+    them."""
+
+    def __init__(self, cursor, rows, rowcount=None):
+        self._cursor = cursor
+        self._rows = collections.deque(rows)
+        self.rowcount = len(self._rows) if rowcount is None else rowcount
+        self.lastrowid = cursor.lastrowid
+        self.description = cursor.description
+        self.arraysize = cursor.arraysize
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    @asyncio.coroutine
+    def fetchone(self):
+        if self._rows:
+            return self._rows.popleft()
+        return None
+
+    @asyncio.coroutine
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        rows = self._rows
+        return [rows.popleft() for _ in range(min(size, len(rows)))]
+
+    @asyncio.coroutine
+    def fetchall(self):
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    @asyncio.coroutine
+    def close(self):
+        self._rows.clear()
+        yield from self._cursor.close()
+
+
 class RowProxy(Mapping):
 
     __slots__ = ('_result_proxy', '_row', '_processors', '_keymap')
@@ -250,6 +293,18 @@ class ResultProxy:
             yield from self.close()
             self._weak = None
 
+    @asyncio.coroutine
+    def _buffer(self):
+        """Fetch the remaining rows and close the DBAPI cursor, so
+        the underlying connection can be returned to the pool while
+        this result is still being read."""
+        cursor = self._cursor
+        if self._metadata is None or isinstance(cursor, _BufferedCursor):
+            return
+        rows = yield from cursor.fetchall()
+        self._cursor = _BufferedCursor(cursor, rows, self._rowcount)
+        yield from cursor.close()
+
     @property
     def dialect(self):
         """SQLAlchemy dialect."""
@@ -0,0 +1,110 @@
+"""
+根据 acquire 等待时间自动调整连接池大小
+"""
+from .metrics import percentiles
+
+__all__ = ['AdaptivePoolSizer']
+
+
+class AdaptivePoolSizer:
+    """
+    每 interval 秒观察一次 pool:
+    等待时间 p95 超过 grow_wait, 有协程在等待, 或使用率达到 high_water 时
+    提前在后台创建 step 个连接 (不超过 maxsize);
+    使用率持续 quiet_period 秒不高于 low_water 时每次关闭 step 个空闲连接
+    (不低于 minsize). 两个阈值与静默期构成滞后区间, 避免来回抖动.
+    """
+
+    def __init__(
+            self,
+            interval=1.0,
+            grow_wait=0.01,
+            high_water=0.8,
+            low_water=0.3,
+            quiet_period=30.0,
+            step=1
+    ):
+        if not 0 <= low_water < high_water <= 1:
+            raise ValueError(
+                "low_water and high_water should satisfy "
+                "0 <= low_water < high_water <= 1"
+            )
+        self._interval = interval
+        self._grow_wait = grow_wait
+        self._high_water = high_water
+        self._low_water = low_water
+        self._quiet_period = quiet_period
+        self._step = step
+        self._pool = None
+        self._handle = None
+        self._seen = 0
+        self._quiet_since = None
+
+    @property
+    def pool(self):
+        """
+        绑定的 pool
+        """
+        return self._pool
+
+    def attach(self, pool):
+        """
+        绑定 pool 并开始定时调整
+        """
+        if self._pool is not None:
+            raise RuntimeError('sizer is already attached to a pool')
+        self._pool = pool
+        self._seen = pool.wait_times.count
+        self._quiet_since = None
+        self._schedule()
+
+    def detach(self):
+        """
+        停止调整
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pool = None
+
+    def _schedule(self):
+        self._handle = self._pool._loop.call_later(
+            self._interval,
+            self._tick
+        )
+
+    def _tick(self):
+        self.adjust()
+        if self._pool is not None:
+            self._schedule()
+
+    def adjust(self):
+        """
+        执行一次调整, 返回增加(正数)或关闭(负数)的连接数
+        """
+        pool = self._pool
+        wait_times = pool.wait_times
+        waits = wait_times.latest(wait_times.count - self._seen)
+        self._seen = wait_times.count
+        size = pool.size
+        demand = size - pool.freesize + pool.waiters
+        usage = demand / size if size else float(demand > 0)
+
+        slow = waits and \
+            percentiles(waits, (95,))[95] > self._grow_wait
+        if slow or pool.waiters or usage >= self._high_water:
+            self._quiet_since = None
+            return pool._grow(self._step)
+        if usage > self._low_water:
+            self._quiet_since = None
+            return 0
+
+        now = pool._loop.time()
+        if self._quiet_since is None:
+            self._quiet_since = now
+            return 0
+        if now - self._quiet_since < self._quiet_period:
+            return 0
+        # 每经过一个静默期收缩一次
+        self._quiet_since = now
+        return -pool._shrink(self._step)
@@ -0,0 +1,166 @@
+"""
+慢查询日志, 自动在空闲连接上执行 EXPLAIN QUERY PLAN
+"""
+import asyncio
+import collections
+import re
+
+from .fingerprint import fingerprint
+from .utils import create_task, native_fetchall, run_native
+from .log import LOGGER as logger
+
+__all__ = ['SlowQueryLog', 'SlowQuery']
+
+SlowQuery = collections.namedtuple(
+    'SlowQuery',
+    ['fingerprint', 'sql', 'duration', 'rows', 'plan', 'flags']
+)
+
+_EXPLAINABLE = re.compile(
+    r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b',
+    re.I
+)
+
+
+def plan_flags(plan):
+    """
+    从 EXPLAIN QUERY PLAN 的 detail 中找出全表扫描与临时 B-tree 排序
+    """
+    flags = []
+    for detail in plan:
+        if detail.startswith('SCAN') and 'INDEX' not in detail:
+            flags.append('full_scan')
+        if 'USE TEMP B-TREE' in detail:
+            flags.append('temp_btree')
+    return sorted(set(flags))
+
+
+class SlowQueryLog:
+    """
+    语句事件监听: 耗时不低于 threshold 秒的语句记录 warning 日志,
+    并在后台对 target (Connection 或 Pool) 的空闲连接执行
+    EXPLAIN QUERY PLAN, 同一指纹 explain_interval 秒内只分析一次
+    """
+
+    def __init__(
+            self,
+            threshold,
+            target=None,
+            explain=True,
+            explain_interval=60.0,
+            history=100
+    ):
+        self._threshold = threshold
+        self._target = target
+        self._explain = explain and target is not None
+        self._explain_interval = explain_interval
+        self._explained = {}
+        self._tasks = set()
+        self.queries = collections.deque(maxlen=history)
+
+    @property
+    def threshold(self):
+        """
+        慢查询阈值(秒)
+        """
+        return self._threshold
+
+    def __call__(self, event):
+        duration = event.duration
+        if duration < self._threshold or event.error is not None:
+            return
+        key = fingerprint(event.sql)
+        logger.warning(
+            'slow query %.3fs rows=%d: %s',
+            duration,
+            event.rows,
+            key
+        )
+        if self._explain and self._should_explain(key, event):
+            loop = self._target._loop
+            task = create_task(self._run_explain(key, event), loop)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.queries.append(
+                SlowQuery(key, event.sql, duration, event.rows, None, [])
+            )
+
+    def _should_explain(self, key, event):
+        if event.method not in ('execute', 'executemany') or \
+                not _EXPLAINABLE.match(event.sql):
+            return False
+        now = self._target._loop.time()
+        last = self._explained.get(key)
+        if last is not None and now - last < self._explain_interval:
+            return False
+        if len(self._explained) >= 1024:
+            self._explained.clear()
+        self._explained[key] = now
+        return True
+
+    @asyncio.coroutine
+    def _run_explain(self, key, event):
+        parameters = event.parameters
+        if parameters is None:
+            parameters = ()
+        elif event.method == 'executemany':
+            parameters = next(iter(parameters), ())
+        plan = None
+        try:
+            rows = yield from self._explain_on_idle(
+                'EXPLAIN QUERY PLAN ' + event.sql,
+                parameters
+            )
+        except Exception:
+            logger.warning('explain slow query failed', exc_info=True)
+        else:
+            if rows is not None:
+                plan = [row[-1] for row in rows]
+        flags = plan_flags(plan or ())
+        if plan is not None:
+            logger.warning(
+                'slow query plan%s: %s\n  %s',
+                ' [%s]' % ', '.join(flags) if flags else '',
+                key,
+                '\n  '.join(plan)
+            )
+        self.queries.append(
+            SlowQuery(key, event.sql, event.duration, event.rows, plan, flags)
+        )
+
+    @asyncio.coroutine
+    def _explain_on_idle(self, sql, parameters):
+        """
+        Pool 只使用空闲连接, 没有时放弃 (返回 None)
+        """
+        target = self._target
+        if hasattr(target, 'async_execute'):
+            if target.closed:
+                return None
+            return (yield from run_native(
+                target,
+                native_fetchall,
+                sql,
+                parameters
+            ))
+        conn = target._acquire_free()
+        if conn is None:
+            return None
+        try:
+            return (yield from run_native(
+                conn,
+                native_fetchall,
+                sql,
+                parameters
+            ))
+        finally:
+            yield from target.release(conn)
+
+    @asyncio.coroutine
+    def join(self):
+        """
+        等待后台的 EXPLAIN 完成
+        """
+        while self._tasks:
+            yield from asyncio.gather(*self._tasks, return_exceptions=True)
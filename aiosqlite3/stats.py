@@ -0,0 +1,130 @@
+"""
+按 sql 指纹汇总语句执行统计 (类似 pg_stat_statements)
+"""
+import collections
+
+from .fingerprint import fingerprint
+from .metrics import Reservoir
+
+__all__ = ['StatementStats', 'StatementStat']
+
+StatementStat = collections.namedtuple(
+    'StatementStat',
+    [
+        'fingerprint',
+        'calls',
+        'total_time',
+        'mean_time',
+        'max_time',
+        'p95_time',
+        'rows',
+        'errors'
+    ]
+)
+
+
+class _Entry:
+    __slots__ = ('calls', 'total_time', 'max_time', 'rows', 'errors', 'times')
+
+    def __init__(self, samples):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.times = Reservoir(samples)
+
+
+class StatementStats:
+    """
+    语句事件监听, 按指纹汇总调用次数, 耗时, 行数与失败次数
+    通过 events.add_listener 或 Connection/Pool.add_listener 注册
+    最多跟踪 max_fingerprints 个指纹, 满了淘汰调用次数最少的一个
+    p95 由每个指纹最近 samples 次耗时计算
+    """
+
+    def __init__(self, max_fingerprints=1000, samples=256):
+        self._max_fingerprints = max_fingerprints
+        self._samples = samples
+        self._entries = {}
+        self._evicted = 0
+
+    @property
+    def evicted(self):
+        """
+        被淘汰的指纹数
+        """
+        return self._evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __call__(self, event):
+        key = fingerprint(event.sql)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self._max_fingerprints:
+                self._evict()
+            entry = self._entries[key] = _Entry(self._samples)
+        duration = event.duration
+        entry.calls += 1
+        entry.total_time += duration
+        if duration > entry.max_time:
+            entry.max_time = duration
+        entry.times.add(duration)
+        # 查询记取回的行数, 其余记影响的行数
+        entry.rows += event.rows or max(event.rowcount, 0)
+        if event.error is not None:
+            entry.errors += 1
+
+    def _evict(self):
+        entries = self._entries
+        del entries[min(entries, key=lambda key: entries[key].calls)]
+        self._evicted += 1
+
+    def _stat(self, key, entry):
+        return StatementStat(
+            key,
+            entry.calls,
+            entry.total_time,
+            entry.total_time / entry.calls,
+            entry.max_time,
+            entry.times.percentile(95),
+            entry.rows,
+            entry.errors
+        )
+
+    def get(self, sql):
+        """
+        sql 所属指纹的统计, 没有记录时为 None
+        """
+        key = fingerprint(sql)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return self._stat(key, entry)
+
+    def snapshot(self):
+        """
+        所有指纹的统计, 按总耗时降序
+        """
+        return self.top(None)
+
+    def top(self, count=10, order_by='total_time'):
+        """
+        按 order_by (StatementStat 的字段) 降序的前 count 个指纹
+        """
+        stats = [
+            self._stat(key, entry) for key, entry in self._entries.items()
+        ]
+        stats.sort(key=lambda stat: getattr(stat, order_by), reverse=True)
+        if count is not None:
+            stats = stats[:count]
+        return stats
+
+    def reset(self):
+        """
+        清空统计
+        """
+        self._entries.clear()
+        self._evicted = 0
@@ -2,10 +2,17 @@
 代理方法工具
 """
 import asyncio
+import os
 import sys
+import traceback
 
 PY_35 = sys.version_info >= (3, 5)
 
+# sqlite 编译期默认的最大绑定参数数量 (3.32.0 之前为 999)
+SQLITE_MAX_VARIABLE_NUMBER = 999
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
 if PY_35:
     from collections.abc import Coroutine
     BASE = Coroutine
@@ -32,6 +39,51 @@ def create_task(coro, loop):
     return asyncio.Task(coro, loop=loop)
 
 
+def caller_stack(limit=None):
+    """
+    调用方的栈, 跳过本包内部的帧
+    """
+    frame = sys._getframe(1)
+    while frame is not None and \
+            frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame = frame.f_back
+    if frame is None:
+        # pragma: no cover
+        return []
+    return traceback.extract_stack(frame, limit=limit)
+
+
+def native_fetchall(conn, sql, parameters):
+    """
+    在工作线程中用原生 connection 执行查询并取回全部记录
+    """
+    cursor = conn.execute(sql, parameters)
+    try:
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+@asyncio.coroutine
+def run_native(target, func, *args):
+    """
+    在 target (Connection 或 Pool 中取出的连接) 的工作线程中执行
+    func(原生 connection, *args), 只需一次线程切换
+    """
+    if not hasattr(target, 'async_execute'):
+        conn = yield from target.acquire()
+        try:
+            return (yield from run_native(conn, func, *args))
+        finally:
+            yield from target.release(conn)
+    target._query_count += 1
+    return (yield from target.async_execute(
+        func,
+        target.native_connection,
+        *args
+    ))
+
+
 class _ContextManager(BASE):
     __slots__ = ('_coro', '_obj')
 
@@ -543,3 +543,123 @@ def test_create_table(connect):
     res = yield from conn.execute("SELECT * FROM sa_tbl")
     data = yield from async_res_list(res)
     assert 0 == len(data)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_bulk_insert(connect):
+    conn = yield from connect()
+    yield from conn.connection.commit()
+    rows = [{'name': 'bulk%d' % i} for i in range(2500)]
+    count = yield from conn.bulk_insert(tbl, rows)
+    assert 2500 == count
+    assert not conn.in_transaction
+    assert not conn.connection.in_transaction
+    res = yield from conn.scalar(tbl.count())
+    assert 2501 == res
+    res = yield from conn.execute(tbl.select().where(tbl.c.id == 2501))
+    row = yield from res.first()
+    assert 'bulk2499' == row.name
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_bulk_insert_chunk_rows(connect):
+    conn = yield from connect()
+    compile_bulk = sa.connection._compile_bulk_insert
+    compile_bulk.cache_clear()
+    rows = [{'id': i + 10, 'name': 'bulk'} for i in range(5)]
+    count = yield from conn.bulk_insert(tbl, rows, chunk_rows=2)
+    assert 5 == count
+    # chunk of 2 compiled once, last chunk of 1 compiled once
+    assert 2 == compile_bulk.cache_info().misses
+    assert 1 == compile_bulk.cache_info().hits
+    res = yield from conn.scalar(tbl.count())
+    assert 6 == res
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_bulk_insert_in_transaction(connect):
+    conn = yield from connect()
+    yield from conn.connection.commit()
+    tr = yield from conn.begin()
+    count = yield from conn.bulk_insert(tbl, [{'name': 'a'}, {'name': 'b'}])
+    assert 2 == count
+    assert tr.is_active
+    yield from tr.rollback()
+    res = yield from conn.scalar(tbl.count())
+    assert 1 == res
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_bulk_insert_rollback(connect):
+    conn = yield from connect()
+    yield from conn.connection.commit()
+    rows = [{'id': 5, 'name': 'a'}, {'id': 5, 'name': 'b'}]
+    with pytest.raises(aiosqlite3.IntegrityError):
+        yield from conn.bulk_insert(tbl, rows, chunk_rows=1)
+    assert not conn.in_transaction
+    res = yield from conn.scalar(tbl.count())
+    assert 1 == res
+
+    with pytest.raises(sa.ArgumentError):
+        yield from conn.bulk_insert(tbl, [{'name': 'a'}, {'id': 6}])
+    assert 0 == (yield from conn.bulk_insert(tbl, []))
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_insert_returning(connect):
+    conn = yield from connect()
+    res = yield from conn.execute(
+        tbl.insert().values(name='second').returning(tbl.c.id, tbl.c.name)
+    )
+    assert ('id', 'name') == res.keys()
+    row = yield from res.first()
+    assert 2 == row.id
+    assert 'second' == row[tbl.c.name]
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_update_delete_returning(connect):
+    conn = yield from connect()
+    yield from conn.execute(tbl.insert().values(name='second'))
+    res = yield from conn.execute(
+        tbl.update().values(name='updated').returning(tbl.c.id)
+    )
+    rows = yield from res.fetchall()
+    assert [1, 2] == sorted(row.id for row in rows)
+
+    res = yield from conn.execute(
+        tbl.delete().where(tbl.c.id == 2).returning(tbl.c.name)
+    )
+    assert 'updated' == (yield from res.scalar())
+    assert 1 == (yield from conn.scalar(tbl.count()))
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_executemany_returning(connect):
+    conn = yield from connect()
+    query = tbl.insert().returning(tbl.c.id, tbl.c.name)
+    res = yield from conn.execute(
+        query,
+        [
+            {'id': 10, 'name': 'a'},
+            {'id': 11, 'name': 'b'},
+            {'id': 12, 'name': 'c'}
+        ]
+    )
+    assert res.returns_rows
+    assert 3 == res.rowcount
+    row = yield from res.fetchone()
+    assert (10, 'a') == row
+    rows = yield from res.fetchmany(1)
+    assert [(11, 'b')] == rows
+    rows = yield from res.fetchall()
+    assert [(12, 'c')] == rows
+    assert res.closed
+    assert 4 == (yield from conn.scalar(tbl.count()))
@@ -2,6 +2,7 @@ import asyncio
 import datetime
 
 import pytest
+from unittest import mock
 import sqlalchemy as sa
 from sqlalchemy.sql.ddl import CreateTable
 
@@ -91,3 +92,33 @@ def test_default_fields_edit(engine):
         assert row.is_active == 0
         assert row.date == date
         yield from res.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_default_fields_executemany(engine):
+    query = tbl.insert().values(name=sa.bindparam('name'))
+    compiled = query.compile(dialect=engine.dialect)
+    scalars, callables = compiled._prefetch_defaults
+    assert scalars == {'count': 100, 'count_str': 6, 'is_active': True}
+    assert [key for key, _ in callables] == ['date']
+    assert compiled._prefetch_defaults is compiled._prefetch_defaults
+
+    dates = [datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 2)]
+    with mock.patch.object(
+            compiled,
+            '_prefetch_defaults',
+            (scalars, [('date', mock.Mock(side_effect=dates))])
+    ):
+        rows = compiled.construct_params_many([{'name': 'a'}, {'name': 'b'}])
+    assert [row['date'] for row in rows] == dates
+    assert [row['name'] for row in rows] == ['a', 'b']
+    assert all(row['count'] == 100 for row in rows)
+
+    with (yield from engine) as conn:
+        yield from conn.execute(query, [{'name': 'a'}, {'name': 'b'}])
+        res = yield from conn.execute(tbl.select().order_by(tbl.c.id))
+        rows = yield from res.fetchall()
+        assert [row.name for row in rows] == ['a', 'b']
+        assert [row.count for row in rows] == [100, 100]
+        assert all(isinstance(row.date, datetime.datetime) for row in rows)
@@ -1,7 +1,10 @@
 import asyncio
+import json
 # from aiosqlite3.connection import TIMEOUT
 import pytest
-from sqlalchemy import MetaData, Table, Column, Integer, String
+
+import aiosqlite3
+from sqlalchemy import MetaData, Table, Column, Integer, String, JSON
 
 
 sa = pytest.importorskip("aiosqlite3.sa")
@@ -23,6 +26,13 @@ tbl = Table(
         )
 )
 
+json_tbl = Table(
+    'sa_json_tbl',
+    meta,
+    Column('id', Integer, nullable=False, primary_key=True),
+    Column('data', JSON)
+)
+
 
 @pytest.fixture
 def engine(make_engine, loop):
@@ -131,3 +141,98 @@ def test_terminate_with_acquired_connections(make_engine):
     engine.terminate()
     yield from engine.wait_closed()
     assert conn.closed
+
+
+def test_default_json_serializer(engine):
+    dialect = engine.dialect
+    assert dialect._json_serializer is sa.engine.json_dumps
+    assert dialect._json_deserializer is sa.engine.json_deserializer
+    assert sa.engine.json_dumps is json.dumps
+    assert sa.engine.json_loads(sa.engine.json_dumps({'a': [1]})) == {
+        'a': [1]
+    }
+
+
+def test_orjson_serializer():
+    if sa.engine.orjson_dumps is None:
+        pytest.skip('orjson is not installed')
+    assert '{"1":[1]}' == sa.engine.orjson_dumps({1: [1]})
+    assert {'1': [1]} == sa.engine.orjson_loads('{"1":[1]}')
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_custom_json_serializer(make_engine):
+    dumped = []
+
+    def dumps(obj):
+        dumped.append(obj)
+        return sa.engine.json_dumps(obj)
+
+    engine = yield from make_engine(
+        json_serializer=dumps,
+        json_deserializer=sa.engine.json_loads
+    )
+    assert engine.dialect is not sa.engine._dialect
+    assert engine.dialect.paramstyle == 'named'
+    with (yield from engine) as conn:
+        yield from conn.execute('DROP TABLE IF EXISTS sa_json_tbl')
+        yield from conn.execute(
+            'CREATE TABLE sa_json_tbl (id INTEGER PRIMARY KEY, data JSON)'
+        )
+        yield from conn.execute(json_tbl.insert().values(data={'a': [1, 2]}))
+        res = yield from conn.execute(json_tbl.select())
+        row = yield from res.first()
+        assert row.data == {'a': [1, 2]}
+    assert dumped == [{'a': [1, 2]}]
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_engine_execute(engine):
+    yield from engine.execute('DROP TABLE IF EXISTS sa_tbl3')
+    yield from engine.execute(
+        'CREATE TABLE sa_tbl3 (id INTEGER PRIMARY KEY, name varchar(255))'
+    )
+    yield from engine.execute(tbl.insert().values(name='first'))
+    yield from engine.execute(tbl.insert().values(name='second'))
+    res = yield from engine.execute(tbl.select().order_by(tbl.c.id))
+    assert 1 == engine.freesize
+    rows = yield from res.fetchall()
+    assert ['first', 'second'] == [row.name for row in rows]
+    assert res.closed
+    assert 2 == (yield from engine.scalar(tbl.count()))
+
+    # committed, visible from another connection
+    conn1 = yield from engine.acquire()
+    conn2 = yield from engine.acquire()
+    try:
+        assert 2 == (yield from conn2.scalar(tbl.count()))
+    finally:
+        yield from engine.release(conn1)
+        yield from engine.release(conn2)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_engine_execute_error(engine):
+    with pytest.raises(aiosqlite3.OperationalError):
+        yield from engine.execute('SELECT * FROM no_such_table')
+    assert 1 == engine.freesize
+    assert 0 == engine.size - engine.freesize
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_sa_connection_per_checkout(engine):
+    conn1 = yield from engine.acquire()
+    yield from engine.release(conn1)
+    conn2 = yield from engine.acquire()
+    # a previous borrower never shares the wrapper of the next one
+    assert conn1 is not conn2
+    assert conn1.connection is conn2.connection
+    yield from engine.release(conn2)
+    for _ in range(3):
+        yield from engine.scalar('SELECT 1')
+    counters = engine._pool.counters
+    assert counters['acquires'] == counters['releases']
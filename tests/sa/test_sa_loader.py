@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from sqlalchemy import MetaData, Table, Column, Integer, String
+
+
+sa = pytest.importorskip("aiosqlite3.sa")
+
+meta = MetaData()
+tbl = Table(
+    'sa_loader_tbl',
+    meta,
+    Column('id', Integer, nullable=False, primary_key=True),
+    Column('grp', String(255)),
+    Column('name', String(255))
+)
+
+
+@pytest.fixture
+def engine(make_engine, loop):
+
+    @asyncio.coroutine
+    def start():
+        engine = yield from make_engine()
+        yield from engine.execute('DROP TABLE IF EXISTS sa_loader_tbl')
+        yield from engine.execute(
+            'CREATE TABLE sa_loader_tbl '
+            '(id INTEGER PRIMARY KEY, grp varchar(255), name varchar(255))'
+        )
+        for row in ((1, 'a', 'one'), (2, 'a', 'two'), (3, 'b', 'three')):
+            yield from engine.execute(tbl.insert().values(
+                id=row[0],
+                grp=row[1],
+                name=row[2]
+            ))
+        return engine
+    return loop.run_until_complete(start())
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_sa_table_loader(engine, loop):
+    loader = sa.table_loader(engine, tbl, 'id', loop=loop)
+    rows = yield from loader.load_many([2, 3, 4])
+    assert ['two', 'three'] == [row.name for row in rows[:2]]
+    assert rows[2] is None
+    assert loader.batches == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_sa_table_loader_many(engine, loop):
+    conn = yield from engine.acquire()
+    try:
+        loader = sa.table_loader(conn, tbl, tbl.c.grp, many=True, loop=loop)
+        groups = yield from loader.load_many(['a', 'c'])
+        assert [1, 2] == sorted(row.id for row in groups[0])
+        assert [] == groups[1]
+    finally:
+        yield from engine.release(conn)
@@ -349,3 +349,64 @@ async def test_transaction_context(sa_connect):
         assert tr1.is_active
     res = await conn.scalar(tbl.count())
     assert 2 == res
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_nested_transaction_deferred_savepoint(sa_connect):
+    conn = yield from sa_connect()
+    tr1 = yield from conn.begin_nested()
+    tr2 = yield from conn.begin_nested()
+    assert conn._pending_savepoints == [tr2._savepoint]
+
+    yield from conn.execute(tbl.insert().values(name='aaaa'))
+    assert conn._pending_savepoints == []
+
+    yield from tr2.rollback()
+    assert tr1.is_active
+    res = yield from conn.scalar(tbl.count())
+    assert 1 == res
+    yield from tr1.commit()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_nested_transaction_unused_savepoint(sa_connect):
+    conn = yield from sa_connect()
+    tr1 = yield from conn.begin_nested()
+    yield from conn.execute(tbl.insert().values(name='aaaa'))
+    tr2 = yield from conn.begin_nested()
+    tr3 = yield from conn.begin_nested()
+    assert conn._pending_savepoints == [tr2._savepoint, tr3._savepoint]
+
+    with mock.patch.object(conn.connection, 'async_execute') as execute:
+        yield from tr3.commit()
+        yield from tr2.rollback()
+    assert not execute.called
+    assert conn._pending_savepoints == []
+
+    yield from tr1.commit()
+    res = yield from conn.scalar(tbl.count())
+    assert 2 == res
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_nested_transaction_failed_savepoint(sa_connect):
+    conn = yield from sa_connect()
+    tr1 = yield from conn.begin_nested()
+    tr2 = yield from conn.begin_nested()
+    assert conn._pending_savepoints == [tr2._savepoint]
+
+    @asyncio.coroutine
+    def fail(func):
+        raise sa.Error('savepoint failed')
+
+    with mock.patch.object(conn.connection, 'async_execute', fail):
+        with pytest.raises(sa.Error):
+            yield from conn.execute(tbl.insert().values(name='aaaa'))
+    # the savepoint was never created, so nothing is rolled back to it
+    assert conn._pending_savepoints == [tr2._savepoint]
+    yield from tr2.rollback()
+    assert conn._pending_savepoints == []
+    yield from tr1.rollback()
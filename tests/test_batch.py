@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+import aiosqlite3
+from aiosqlite3 import WriteBatcher, WriteResult
+
+
+@asyncio.coroutine
+def create_table(conn):
+    cur = yield from conn.execute('DROP TABLE IF EXISTS batch_tbl')
+    yield from cur.close()
+    cur = yield from conn.execute(
+        'CREATE TABLE batch_tbl (id INTEGER PRIMARY KEY, name TEXT UNIQUE)'
+    )
+    yield from cur.close()
+    yield from conn.commit()
+
+
+@asyncio.coroutine
+def count_rows(conn):
+    cur = yield from conn.execute('SELECT count(*) FROM batch_tbl')
+    (count,) = yield from cur.fetchone()
+    yield from cur.close()
+    return count
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_group_commit(loop, conn):
+    yield from create_table(conn)
+    batcher = WriteBatcher(conn, window=0.01)
+    sql = 'INSERT INTO batch_tbl (name) VALUES (?)'
+    with mock.patch.object(conn, 'commit') as commit:
+        results = yield from asyncio.gather(
+            *[batcher.execute(sql, ('n%d' % i,)) for i in range(5)],
+            loop=loop
+        )
+    assert not commit.called
+    assert [WriteResult(1, i) for i in range(1, 6)] == results
+    assert batcher.batches == 1
+    assert batcher.statements == 5
+    assert not conn.in_transaction
+    assert 5 == (yield from count_rows(conn))
+    yield from batcher.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_group_commit_isolates_errors(loop, conn):
+    yield from create_table(conn)
+    batcher = WriteBatcher(conn, window=0.01)
+    sql = 'INSERT INTO batch_tbl (name) VALUES (?)'
+    results = yield from asyncio.gather(
+        batcher.execute(sql, ('a',)),
+        batcher.execute(sql, ('a',)),
+        batcher.execute('INSERT INTO no_such_tbl VALUES (1)'),
+        batcher.execute(sql, ('b',)),
+        loop=loop,
+        return_exceptions=True
+    )
+    assert results[0] == WriteResult(1, 1)
+    assert isinstance(results[1], aiosqlite3.IntegrityError)
+    assert isinstance(results[2], aiosqlite3.OperationalError)
+    assert results[3].rowcount == 1
+    assert 2 == (yield from count_rows(conn))
+    yield from batcher.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_group_commit_max_batch(loop, conn):
+    yield from create_table(conn)
+    batcher = WriteBatcher(conn, window=10, max_batch=2)
+    sql = 'INSERT INTO batch_tbl (name) VALUES (?)'
+    yield from asyncio.gather(
+        batcher.execute(sql, ('a',)),
+        batcher.execute(sql, ('b',)),
+        loop=loop
+    )
+    assert batcher.batches == 1
+    task = asyncio.ensure_future(batcher.execute(sql, ('c',)), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert batcher.pending == 1
+    yield from batcher.close()
+    assert (yield from task).rowcount == 1
+    assert batcher.batches == 2
+    with pytest.raises(RuntimeError):
+        yield from batcher.execute(sql, ('d',))
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_group_commit_pool(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db)
+    conn = yield from pool.acquire()
+    yield from create_table(conn)
+    yield from pool.release(conn)
+    batcher = WriteBatcher(pool, window=0.01)
+    yield from asyncio.gather(
+        batcher.execute('INSERT INTO batch_tbl (name) VALUES (?)', ('a',)),
+        batcher.execute('UPDATE batch_tbl SET name = ?', ('b',)),
+        loop=loop
+    )
+    assert pool.freesize == 1
+    conn = yield from pool.acquire()
+    cur = yield from conn.execute('SELECT name FROM batch_tbl')
+    assert [('b',)] == (yield from cur.fetchall())
+    yield from cur.close()
+    yield from pool.release(conn)
+    yield from batcher.close()
+
+
+def test_invalid_max_batch(loop, conn):
+    with pytest.raises(ValueError):
+        WriteBatcher(conn, max_batch=0)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_group_commit_open_transaction(loop, conn):
+    yield from create_table(conn)
+    cur = yield from conn.execute(
+        "INSERT INTO batch_tbl (name) VALUES ('outer')"
+    )
+    yield from cur.close()
+    assert conn.in_transaction
+    batcher = WriteBatcher(conn, window=0)
+    # joining the caller's transaction could lose acknowledged writes
+    with pytest.raises(RuntimeError):
+        yield from batcher.execute(
+            'INSERT INTO batch_tbl (name) VALUES (?)',
+            ('inner',)
+        )
+    yield from conn.rollback()
+    assert 0 == (yield from count_rows(conn))
+    result = yield from batcher.execute(
+        'INSERT INTO batch_tbl (name) VALUES (?)',
+        ('inner',)
+    )
+    assert result.rowcount == 1
+    assert not conn.in_transaction
@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+
+import pytest
+from unittest import mock
+
+import aiosqlite3
+from aiosqlite3 import blocking
+
+
+@pytest.yield_fixture
+def detector():
+    detector = aiosqlite3.set_blocking_threshold(0)
+    yield detector
+    aiosqlite3.set_blocking_threshold(None)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_blocking_cursor(loop, conn, detector):
+    assert aiosqlite3.get_blocking_detector() is detector
+    yield from conn.execute('CREATE TABLE bl_tbl (a)')
+    yield from conn.executemany('INSERT INTO bl_tbl VALUES (?)', [(1,), (2,)])
+    cur = yield from conn.execute('SELECT a FROM bl_tbl')
+    with mock.patch('aiosqlite3.blocking.logger') as logger:
+        with cur:
+            assert [(1,), (2,)] == list(cur)
+        assert 'async for' in logger.warning.call_args_list[0][0][3]
+    assert detector.counts['Cursor.__next__'] == 3
+    assert detector.counts['Cursor.__exit__'] == 1
+    call = detector.calls[-1]
+    assert call.name == 'Cursor.__exit__'
+    assert call.stack[-1].name == 'test_blocking_cursor'
+
+
+def test_blocking_outside_loop(detector):
+    # without a running loop nothing is blocked
+    detector.observe('Pool.sync_close', 1.0)
+    assert not detector.calls
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_blocking_threaded_setters(loop, make_conn, detector):
+    conn = yield from make_conn(check_same_thread=True)
+    conn.row_factory = sqlite3.Row
+    conn.text_factory = bytes
+    conn.isolation_level = None
+    assert detector.counts == {
+        'Connection.row_factory': 1,
+        'Connection.text_factory': 1,
+        'Connection.isolation_level': 1
+    }
+
+    yield from conn.set_row_factory(None)
+    yield from conn.set_text_factory(str)
+    yield from conn.set_isolation_level('')
+    assert conn.row_factory is None
+    assert conn.text_factory is str
+    assert conn.isolation_level == ''
+    assert 3 == sum(detector.counts.values())
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_blocking_sync_close(loop, db, detector):
+    conn = yield from aiosqlite3.connect(db, loop=loop)
+    conn.sync_close()
+    assert conn.closed
+    pool = yield from aiosqlite3.create_pool(db, loop=loop)
+    pool.sync_close()
+    assert pool.closed
+    assert detector.counts['Connection.__del__'] == 2
+    assert detector.counts['Pool.sync_close'] == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_blocking_threshold(loop, conn):
+    detector = aiosqlite3.set_blocking_threshold(60)
+    try:
+        cur = yield from conn.execute('SELECT 1')
+        assert [(1,)] == list(cur)
+        assert not detector.calls
+    finally:
+        aiosqlite3.set_blocking_threshold(None)
+    assert blocking.call('x', max, 1, 2) == 2
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+from aiosqlite3 import ReadCoalescer
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_coalesce_identical_reads(loop, conn):
+    coalescer = ReadCoalescer(conn)
+    with mock.patch.object(
+            conn,
+            'async_execute',
+            wraps=conn.async_execute
+    ) as execute:
+        results = yield from asyncio.gather(
+            *[coalescer.fetchall('SELECT ?', (1,)) for _ in range(5)],
+            coalescer.fetchall('SELECT ?', (2,)),
+            loop=loop
+        )
+    assert [[(1,)]] * 5 + [[(2,)]] == results
+    assert execute.call_count == 2
+    assert coalescer.calls == 6
+    assert coalescer.executions == 2
+    assert coalescer.coalesced == 4
+    assert coalescer.in_flight == 0
+
+    # finished queries are not cached
+    yield from coalescer.fetchall('SELECT ?', (1,))
+    assert coalescer.executions == 3
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_coalesce_parameter_types(loop, conn):
+    coalescer = ReadCoalescer(conn)
+    results = yield from asyncio.gather(
+        coalescer.fetchall('SELECT ?', (1,)),
+        coalescer.fetchall('SELECT ?', (1.0,)),
+        coalescer.fetchall('SELECT :v', {'v': True}),
+        coalescer.fetchall('SELECT :v', {'v': 1}),
+        loop=loop
+    )
+    # equal but differently typed values are not coalesced
+    assert [[(1,)], [(1.0,)], [(1,)], [(1,)]] == results
+    assert isinstance(results[1][0][0], float)
+    assert coalescer.executions == 4
+
+    # invalid parameters are reported by sqlite3 as usual
+    with pytest.raises(ValueError):
+        yield from coalescer.fetchall('SELECT ?', 1)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_coalesce_cancel_one_caller(loop, conn):
+    coalescer = ReadCoalescer(conn)
+    first = asyncio.ensure_future(
+        coalescer.fetchall('SELECT :a', {'a': 1}),
+        loop=loop
+    )
+    second = asyncio.ensure_future(
+        coalescer.fetchall('SELECT :a', {'a': 1}),
+        loop=loop
+    )
+    yield from asyncio.sleep(0, loop=loop)
+    first.cancel()
+    assert [(1,)] == (yield from second)
+    assert coalescer.coalesced == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_coalesce_error(loop, conn):
+    coalescer = ReadCoalescer(conn)
+    results = yield from asyncio.gather(
+        coalescer.fetchall('SELECT * FROM no_such_tbl'),
+        coalescer.fetchall('SELECT * FROM no_such_tbl'),
+        loop=loop,
+        return_exceptions=True
+    )
+    assert all(isinstance(result, Exception) for result in results)
+    assert coalescer.executions == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_coalesce_pool(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=4)
+    coalescer = ReadCoalescer(pool)
+    results = yield from asyncio.gather(
+        *[coalescer.fetchall('SELECT 42') for _ in range(3)],
+        loop=loop
+    )
+    assert [[(42,)]] * 3 == results
+    assert pool.size == 1
+    assert pool.freesize == 1
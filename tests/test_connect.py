@@ -298,6 +298,25 @@ def test_connect_execute_error(db, loop):
     with pytest.raises(aiosqlite3.OperationalError):
         yield from conn.execute('sdfd')
 
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_connect_reset(db, loop):
+    """
+    测试重置连接状态
+    """
+    conn = yield from aiosqlite3.connect(db, loop=loop, check_same_thread=True)
+    assert not conn.dirty
+    conn.text_factory = bytes
+    yield from conn.execute('CREATE TABLE IF NOT EXISTS reset_t (id)')
+    yield from conn.execute('INSERT INTO reset_t VALUES (1)')
+    assert conn.dirty
+    yield from conn.reset(ping=True)
+    assert not conn.dirty
+    assert not conn.in_transaction
+    assert conn.text_factory is str
+    yield from conn.close()
+
 # def test_connect_context_sync_manager(conn):
 #     """
 #     测试普通上下文
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+import aiosqlite3
+from aiosqlite3 import CounterBuffer
+
+
+@asyncio.coroutine
+def create_table(conn):
+    cur = yield from conn.execute('DROP TABLE IF EXISTS counter_tbl')
+    yield from cur.close()
+    cur = yield from conn.execute(
+        'CREATE TABLE counter_tbl (name TEXT PRIMARY KEY, hits INTEGER)'
+    )
+    yield from cur.close()
+    yield from conn.commit()
+
+
+@asyncio.coroutine
+def read_counters(conn):
+    cur = yield from conn.execute(
+        'SELECT name, hits FROM counter_tbl ORDER BY name'
+    )
+    rows = yield from cur.fetchall()
+    yield from cur.close()
+    return rows
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_counter_buffer(loop, conn):
+    yield from create_table(conn)
+    counters = CounterBuffer(
+        conn,
+        'counter_tbl',
+        'name',
+        'hits',
+        max_delay=0.01
+    )
+    for _ in range(3):
+        counters.incr('a')
+    counters.incr('b', 5)
+    assert counters.pending == 2
+    assert [] == (yield from read_counters(conn))
+
+    yield from asyncio.sleep(0.05, loop=loop)
+    assert counters.pending == 0
+    assert counters.flushes == 1
+    assert [('a', 3), ('b', 5)] == (yield from read_counters(conn))
+
+    counters.incr('a')
+    yield from counters.close()
+    assert [('a', 4), ('b', 5)] == (yield from read_counters(conn))
+    with pytest.raises(RuntimeError):
+        counters.incr('a')
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_counter_buffer_max_keys(loop, conn):
+    yield from create_table(conn)
+    counters = CounterBuffer(
+        conn,
+        'counter_tbl',
+        'name',
+        'hits',
+        max_delay=60,
+        max_keys=2
+    )
+    counters.incr('a')
+    counters.incr('b')
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert counters.pending == 0
+    assert counters.flushes == 1
+    yield from counters.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_counter_buffer_failure_keeps_increments(loop, conn):
+    yield from create_table(conn)
+    counters = CounterBuffer(
+        conn,
+        'counter_tbl',
+        'name',
+        'hits',
+        max_delay=60
+    )
+    counters.incr('a', 2)
+    with mock.patch.object(
+            counters,
+            '_write',
+            side_effect=aiosqlite3.OperationalError('locked')
+    ):
+        counters.flush()
+        counters.incr('a')
+        yield from asyncio.sleep(0.01, loop=loop)
+    assert counters.errors == 1
+    assert counters.pending == 1
+    yield from counters.close()
+    assert [('a', 3)] == (yield from read_counters(conn))
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_counter_buffer_open_transaction(loop, conn):
+    yield from create_table(conn)
+    counters = CounterBuffer(
+        conn,
+        'counter_tbl',
+        'name',
+        'hits',
+        max_delay=0.01
+    )
+    cur = yield from conn.execute(
+        "INSERT INTO counter_tbl (name, hits) VALUES ('outer', 1)"
+    )
+    yield from cur.close()
+    assert conn.in_transaction
+    with mock.patch('aiosqlite3.counter.logger'):
+        counters.incr('a', 5)
+        yield from asyncio.sleep(0.05, loop=loop)
+        # the increments are not merged into the caller's transaction
+        assert counters.pending == 1
+        assert counters.flushes == 0
+        assert counters.errors >= 1
+        yield from conn.rollback()
+    yield from asyncio.sleep(0.05, loop=loop)
+    assert counters.pending == 0
+    assert [('a', 5)] == (yield from read_counters(conn))
+    yield from counters.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_counter_buffer_flush_on_pool_close(loop, tmpdir):
+    db = str(tmpdir.join('counter.db'))
+    pool = yield from aiosqlite3.create_pool(db, loop=loop)
+    conn = yield from pool.acquire()
+    yield from create_table(conn)
+    yield from pool.release(conn)
+
+    counters = CounterBuffer(pool, 'counter_tbl', 'name', 'hits', 60)
+    counters.incr('a', 7)
+    pool.close()
+    yield from pool.wait_closed()
+    assert counters.pending == 0
+
+    conn = yield from aiosqlite3.connect(db, loop=loop)
+    assert [('a', 7)] == (yield from read_counters(conn))
+    yield from conn.close()
@@ -89,3 +89,19 @@ async def test_cursor_executescript(cursor):
         print(resp)
         assert resp == (index, str(index))
         index += 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_cursor_executemany_returning(cursor):
+    """
+    测试批量执行并返回 RETURNING 结果
+    """
+    yield from cursor.execute(
+        'CREATE TABLE student (id INTEGER PRIMARY KEY, name varchar(20))'
+    )
+    rows = yield from cursor.executemany_returning(
+        'insert into student(name) values(?) returning id, name',
+        [('a',), ('b',)]
+    )
+    assert rows == [(1, 'a'), (2, 'b')]
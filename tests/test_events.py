@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+import aiosqlite3
+from aiosqlite3 import events
+
+
+@pytest.yield_fixture
+def global_events():
+    seen = []
+    events.add_listener(seen.append)
+    yield seen
+    events.remove_listener(seen.append)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_statement_events(loop, conn):
+    seen = []
+    assert not conn.instrumented
+    conn.add_listener(seen.append)
+    assert conn.instrumented
+
+    cur = yield from conn.execute('CREATE TABLE ev_tbl (id)')
+    yield from cur.close()
+    yield from conn.executemany('INSERT INTO ev_tbl VALUES (?)', [(1,), (2,)])
+    assert ['execute', 'executemany'] == [event.method for event in seen]
+    assert seen[1].rowcount == 2
+    assert seen[1].rows == 0
+
+    cur = yield from conn.cursor()
+    yield from cur.execute('SELECT id FROM ev_tbl WHERE id > ?', (0,))
+    # result set statements finish once fully fetched
+    assert len(seen) == 2
+    assert (1,) == (yield from cur.fetchone())
+    assert [(2,)] == (yield from cur.fetchmany(5))
+    assert len(seen) == 3
+    event = seen[2]
+    assert event.finished
+    assert event.sql == 'SELECT id FROM ev_tbl WHERE id > ?'
+    assert event.parameters == (0,)
+    assert event.rows == 2
+    assert event.execute_time > 0
+    assert event.fetch_time > 0
+    assert event.queue_wait > 0
+    assert event.duration == pytest.approx(
+        event.queue_wait + event.execute_time + event.fetch_time
+    )
+    assert 'rows=2' in repr(event)
+
+    # closing or re-executing finishes the pending statement
+    yield from cur.execute('SELECT id FROM ev_tbl')
+    yield from cur.execute('SELECT 1')
+    assert len(seen) == 4
+    yield from cur.close()
+    assert len(seen) == 5
+
+    conn.remove_listener(seen.append)
+    assert not conn.instrumented
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_statement_error_event(loop, conn, global_events):
+    assert conn.instrumented
+    with pytest.raises(aiosqlite3.OperationalError):
+        yield from conn.execute('SELECT * FROM no_such_tbl')
+    cur = yield from conn.cursor()
+    with pytest.raises(aiosqlite3.OperationalError):
+        yield from cur.execute('SELECT * FROM no_such_tbl')
+    yield from cur.close()
+    assert 2 == len(global_events)
+    assert all(
+        isinstance(event.error, aiosqlite3.OperationalError)
+        for event in global_events
+    )
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_listener_error_is_logged(loop, conn):
+    conn.add_listener(mock.Mock(side_effect=ValueError))
+    with mock.patch.object(events.logger, 'exception') as log:
+        cur = yield from conn.execute('SELECT 1')
+        yield from cur.fetchall()
+    assert log.called
+
+
+class StrictParams(tuple):
+
+    def __str__(self):
+        raise AssertionError('parameters formatted with echo off')
+
+    __repr__ = __str__
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_parameters_formatted_lazily(loop, db):
+    conn = yield from aiosqlite3.connect(db, loop=loop)
+    cur = yield from conn.execute('SELECT ?', StrictParams((1,)))
+    assert [(1,)] == (yield from cur.fetchall())
+    yield from cur.execute('SELECT ?', StrictParams((2,)))
+    yield from cur.close()
+    yield from conn.close()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_statement_events_sync_iteration(loop, conn):
+    seen = []
+    conn.add_listener(seen.append)
+    yield from conn.execute('CREATE TABLE ev_sync (id)')
+    yield from conn.executemany('INSERT INTO ev_sync VALUES (?)', [(1,), (2,)])
+    del seen[:]
+
+    cur = yield from conn.execute('SELECT id FROM ev_sync')
+    with cur:
+        assert [(1,), (2,)] == list(cur)
+    assert 1 == len(seen)
+    assert seen[0].rows == 2
+
+    # leaving the block early still finishes the statement
+    cur = yield from conn.execute('SELECT id FROM ev_sync')
+    with cur:
+        assert (1,) == next(cur)
+    assert 2 == len(seen)
+    assert seen[1].rows == 1
+
+    cur = yield from conn.execute('SELECT id FROM ev_sync')
+    cur.__del__()
+    assert 3 == len(seen)
+    conn.remove_listener(seen.append)
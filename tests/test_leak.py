@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+import aiosqlite3
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_leak_detector(loop, pool_maker, db):
+    detector = aiosqlite3.LeakDetector(threshold=0.05, sample_rate=1.0)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=2,
+        maxsize=2,
+        leak_detector=detector
+    )
+    assert pool.leak_detector is detector
+    assert detector.pool is pool
+    with pytest.raises(RuntimeError):
+        detector.attach(pool)
+
+    leaked = yield from pool.acquire()
+    returned = yield from pool.acquire()
+    holders = detector.holders()
+    assert [leaked, returned] == [holder.connection for holder in holders]
+    # the stack points at the caller, not at the pool internals
+    assert holders[0].stack[-1].name == 'test_leak_detector'
+    yield from pool.release(returned)
+    assert [leaked] == [holder.connection for holder in detector.holders()]
+
+    with mock.patch('aiosqlite3.leak.logger') as logger:
+        yield from asyncio.sleep(0.1, loop=loop)
+        assert detector.leaks == 1
+        assert logger.warning.call_count == 1
+        assert 'test_leak_detector' in logger.warning.call_args[0][-1]
+        # each checkout is reported once
+        assert [] == detector.check()
+    assert detector.holders()[0].held >= 0.05
+
+    yield from pool.release(leaked)
+    assert [] == detector.holders()
+    held = yield from pool.acquire()
+    pool.close()
+    assert detector.pool is None
+    assert [] == detector.holders()
+    yield from pool.release(held)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_leak_detector_unsampled(loop, pool_maker, db):
+    detector = aiosqlite3.LeakDetector(threshold=0, sample_rate=0)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        leak_detector=detector
+    )
+    conn = yield from pool.acquire()
+    with mock.patch('aiosqlite3.leak.logger') as logger:
+        assert [conn] == [holder.connection for holder in detector.check()]
+        assert 'not sampled' in logger.warning.call_args[0][-1]
+    assert detector.holders()[0].stack is None
+    yield from pool.release(conn)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_leak_detector_handoff(loop, pool_maker, db):
+    detector = aiosqlite3.LeakDetector(threshold=60, sample_rate=1.0)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=1,
+        leak_detector=detector
+    )
+    conn = yield from pool.acquire()
+
+    @asyncio.coroutine
+    def waiter():
+        return (yield from pool.acquire())
+
+    task = asyncio.ensure_future(waiter(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    yield from pool.release(conn)
+    conn = yield from task
+    # the stack belongs to the coroutine that waited, not the releaser
+    assert detector.holders()[0].stack[-1].name == 'waiter'
+    yield from pool.release(conn)
+
+    # internal checkouts are tracked too
+    conn = pool._acquire_free()
+    assert [conn] == [holder.connection for holder in detector.holders()]
+    yield from pool.release(conn)
+    assert {'acquires': 3, 'releases': 3, 'connects': 1} == pool.counters
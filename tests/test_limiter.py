@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+import aiosqlite3
+from aiosqlite3 import ExecutorLimiter, set_executor_limit
+
+
+@pytest.yield_fixture
+def executor_limit():
+    yield set_executor_limit
+    set_executor_limit(None)
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError):
+        ExecutorLimiter(0)
+
+
+def test_set_executor_limit(executor_limit):
+    assert aiosqlite3.get_executor_limiter() is None
+    limiter = executor_limit(2)
+    assert aiosqlite3.get_executor_limiter() is limiter
+    assert limiter.stats() == {'limit': 2, 'running': 0, 'queued': 0}
+    executor_limit(None)
+    assert aiosqlite3.get_executor_limiter() is None
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_limiter_queues(loop):
+    limiter = ExecutorLimiter(2)
+    event = threading.Event()
+    peak = []
+
+    def job():
+        peak.append(limiter.running)
+        event.wait(1)
+        return 1
+
+    tasks = [
+        asyncio.ensure_future(limiter.run(loop, None, job), loop=loop)
+        for _ in range(5)
+    ]
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert limiter.running == 2
+    assert limiter.queued == 3
+    event.set()
+    assert [1] * 5 == (yield from asyncio.gather(*tasks, loop=loop))
+    assert max(peak) == 2
+    assert limiter.stats() == {'limit': 2, 'running': 0, 'queued': 0}
+    assert limiter.wait_times.count == 5
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_limiter_cancelled_waiter(loop):
+    limiter = ExecutorLimiter(1)
+    event = threading.Event()
+    first = asyncio.ensure_future(
+        limiter.run(loop, None, lambda: event.wait(1)),
+        loop=loop
+    )
+    yield from asyncio.sleep(0, loop=loop)
+    second = asyncio.ensure_future(
+        limiter.run(loop, None, lambda: 2),
+        loop=loop
+    )
+    yield from asyncio.sleep(0, loop=loop)
+    assert limiter.queued == 1
+    second.cancel()
+    yield from asyncio.sleep(0, loop=loop)
+    assert limiter.queued == 0
+    event.set()
+    yield from first
+    assert limiter.running == 0
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_limiter_cancelled_running(loop):
+    limiter = ExecutorLimiter(1)
+    event = threading.Event()
+    first = asyncio.ensure_future(
+        limiter.run(loop, None, lambda: event.wait(1)),
+        loop=loop
+    )
+    yield from asyncio.sleep(0.01, loop=loop)
+    first.cancel()
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert first.cancelled()
+    # the worker thread is still busy, so the slot stays taken
+    assert limiter.running == 1
+    second = asyncio.ensure_future(
+        limiter.run(loop, None, lambda: 2),
+        loop=loop
+    )
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert limiter.queued == 1
+    event.set()
+    assert 2 == (yield from second)
+    assert limiter.running == 0
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_connection_uses_limiter(loop, db, executor_limit):
+    limiter = executor_limit(1)
+    conn = yield from aiosqlite3.connect(db, loop=loop)
+
+    @asyncio.coroutine
+    def query(value):
+        cur = yield from conn.execute('SELECT ?', (value,))
+        row = yield from cur.fetchone()
+        yield from cur.close()
+        return row
+
+    rows = yield from asyncio.gather(query(1), query(2), loop=loop)
+    assert [(1,), (2,)] == rows
+    yield from conn.close()
+    assert limiter.wait_times.count >= 7
+    assert limiter.running == 0
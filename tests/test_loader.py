@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+from aiosqlite3 import Loader, table_loader
+
+
+@asyncio.coroutine
+def create_table(conn):
+    cur = yield from conn.execute('DROP TABLE IF EXISTS loader_tbl')
+    yield from cur.close()
+    cur = yield from conn.execute(
+        'CREATE TABLE loader_tbl (id INTEGER PRIMARY KEY, grp, name)'
+    )
+    yield from cur.close()
+    yield from conn.executemany(
+        'INSERT INTO loader_tbl (id, grp, name) VALUES (?, ?, ?)',
+        [(1, 'a', 'one'), (2, 'a', 'two'), (3, 'b', 'three')]
+    )
+    yield from conn.commit()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_loader_batches_one_tick(loop):
+    calls = []
+
+    @asyncio.coroutine
+    def batch_fn(keys):
+        calls.append(keys)
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader = Loader(batch_fn, loop=loop, max_batch=2)
+    results = yield from asyncio.gather(
+        loader.load(1),
+        loader.load(2),
+        loader.load(1),
+        loader.load(3),
+        loop=loop
+    )
+    assert [10, 20, 10, None] == results
+    assert [[1, 2], [3]] == calls
+    assert loader.loads == 4
+    assert loader.batches == 2
+
+    assert [20, 40] == (yield from loader.load_many([2, 4]))
+    assert [[1, 2], [3], [2, 4]] == calls
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_loader_error(loop):
+    @asyncio.coroutine
+    def batch_fn(keys):
+        raise ValueError(keys)
+
+    loader = Loader(batch_fn, loop=loop)
+    with pytest.raises(ValueError):
+        yield from loader.load_many([1, 2])
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_loader_batch_cancelled(loop):
+    started = asyncio.Event(loop=loop)
+
+    @asyncio.coroutine
+    def batch_fn(keys):
+        started.set()
+        yield from asyncio.sleep(10, loop=loop)
+
+    loader = Loader(batch_fn, loop=loop)
+    load = asyncio.ensure_future(loader.load_many([1, 2]), loop=loop)
+    yield from started.wait()
+    for task in asyncio.Task.all_tasks(loop):
+        if task._coro.__name__ == '_run':
+            task.cancel()
+    # callers are released instead of waiting forever
+    with pytest.raises(asyncio.CancelledError):
+        yield from asyncio.wait_for(load, 1, loop=loop)
+
+
+def test_loader_invalid_max_batch(loop):
+    with pytest.raises(ValueError):
+        Loader(None, loop=loop, max_batch=0)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_table_loader(loop, conn):
+    yield from create_table(conn)
+    loader = table_loader(conn, 'loader_tbl', 'id', 'name')
+    with mock.patch.object(
+            conn,
+            'async_execute',
+            wraps=conn.async_execute
+    ) as execute:
+        results = yield from loader.load_many([3, 1, 9])
+    assert [('three',), ('one',), None] == results
+    assert execute.call_count == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_table_loader_many(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db)
+    conn = yield from pool.acquire()
+    yield from create_table(conn)
+    yield from pool.release(conn)
+    loader = table_loader(pool, 'loader_tbl', 'grp', 'id', many=True)
+    results = yield from loader.load_many(['a', 'b', 'c'])
+    assert [[(1,), (2,)], [(3,)], []] == results
@@ -0,0 +1,37 @@
+import pytest
+
+from aiosqlite3.metrics import Histogram, Reservoir
+
+
+def test_reservoir():
+    reservoir = Reservoir(size=4)
+    assert reservoir.percentile(50) == 0.0
+    for value in (5, 1, 4, 2, 3):
+        reservoir.add(value)
+    # only the last 4 samples are kept
+    assert len(reservoir) == 4
+    assert reservoir.count == 5
+    assert reservoir.total == 15
+    assert reservoir.percentiles((0, 50, 100)) == {0: 1, 50: 3, 100: 4}
+    reservoir.clear()
+    assert len(reservoir) == 0
+    assert reservoir.count == 0
+
+
+def test_reservoir_latest():
+    reservoir = Reservoir(size=4)
+    assert reservoir.latest(2) == []
+    for value in (5, 1, 4, 2, 3):
+        reservoir.add(value)
+    assert reservoir.latest(2) == [2, 3]
+    assert reservoir.latest(10) == [1, 4, 2, 3]
+    assert reservoir.latest(0) == []
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.total == pytest.approx(2.65)
+    assert [(0.1, 2), (1.0, 3), (float('inf'), 4)] == histogram.cumulative()
@@ -1,6 +1,9 @@
 import asyncio
+import gc
+import sqlite3
 
 import pytest
+from unittest import mock
 
 import aiosqlite3
 from aiosqlite3 import Pool, Connection
@@ -490,3 +493,670 @@ def test_pool_del(db, loop):
         pool = yield from aiosqlite3.create_pool(database=db, loop=loop)
         yield from pool.acquire()
     yield from make()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_fast_path(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    with mock.patch.object(pool, '_fill_free_pool') as fill:
+        conn = yield from pool.acquire()
+        yield from pool.release(conn)
+    assert not fill.called
+    assert pool.freesize == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_release_fifo_handoff(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    order = []
+
+    @asyncio.coroutine
+    def waiter(name):
+        c = yield from pool.acquire()
+        order.append(name)
+        assert c is conn
+        yield from pool.release(c)
+
+    tasks = [
+        asyncio.ensure_future(waiter(i), loop=loop)
+        for i in range(3)
+    ]
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert len(pool._waiters) == 3
+    yield from pool.release(conn)
+    # handed to the waiter directly, never put back to free
+    assert pool.freesize == 0
+    assert {conn} == pool._used
+    yield from asyncio.gather(*tasks, loop=loop)
+    assert order == [0, 1, 2]
+    assert pool.freesize == 1
+    assert not pool._waiters
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_cancelled_waiter(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    task1 = asyncio.ensure_future(pool.acquire(), loop=loop)
+    task2 = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+
+    # handed over to task1, which is cancelled before it runs
+    yield from pool.release(conn)
+    task1.cancel()
+    conn2 = yield from task2
+    assert conn2 is conn
+    assert task1.cancelled()
+    yield from pool.release(conn2)
+    assert not pool._waiters
+    assert pool.freesize == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_release_closed_wakeup_waiter(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    yield from conn.close()
+    yield from pool.release(conn)
+    conn2 = yield from task
+    assert conn2 is not conn
+    assert not conn2.closed
+    assert pool.size == 1
+    yield from pool.release(conn2)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_close_fails_waiters(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    pool.close()
+    with pytest.raises(RuntimeError):
+        yield from task
+    yield from pool.release(conn)
+    yield from pool.wait_closed()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_timeout(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    with pytest.raises(asyncio.TimeoutError):
+        yield from pool.acquire(timeout=0.01)
+    assert pool.waiters == 0
+    yield from pool.release(conn)
+    assert pool.freesize == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_timeout_covers_connect(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=0, maxsize=1)
+    connect = pool._connect
+
+    @asyncio.coroutine
+    def slow_connect():
+        yield from asyncio.sleep(1, loop=loop)
+        return (yield from connect())
+
+    with mock.patch.object(pool, '_connect', slow_connect):
+        start = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            yield from pool.acquire(timeout=0.05)
+        assert loop.time() - start < 0.5
+    assert pool.size == 0
+    conn = yield from pool.acquire(timeout=1)
+    yield from pool.release(conn)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_default_timeout(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=1,
+        acquire_timeout=0.01
+    )
+    conn = yield from pool.acquire()
+    with pytest.raises(asyncio.TimeoutError):
+        yield from pool.acquire()
+    yield from pool.release(conn)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_waiters(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=1,
+        max_waiters=1
+    )
+    assert pool.max_waiters == 1
+    conn = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert pool.waiters == 1
+    with pytest.raises(aiosqlite3.PoolOverloadedError):
+        yield from pool.acquire()
+    yield from pool.release(conn)
+    conn = yield from task
+    assert pool.waiters == 0
+    yield from pool.release(conn)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_wait_time_percentiles(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.05, loop=loop)
+    yield from pool.release(conn)
+    conn = yield from task
+    yield from pool.release(conn)
+
+    assert pool.wait_times.count == 2
+    stats = pool.wait_time_percentiles((0, 50, 100))
+    assert stats[0] < 0.05
+    assert stats[100] >= 0.05
+    assert pool.wait_times.percentile(100) == stats[100]
+
+
+@asyncio.coroutine
+def wait_pool_tasks(pool, loop):
+    while pool._tasks:
+        yield from asyncio.gather(*pool._tasks, loop=loop)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_queries(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, max_queries=2)
+    conn = yield from pool.acquire()
+    cur = yield from conn.execute('SELECT 1')
+    yield from cur.close()
+    assert conn.query_count == 1
+    yield from pool.release(conn)
+    assert pool.freesize == 1
+
+    conn = yield from pool.acquire()
+    cur = yield from conn.cursor()
+    yield from cur.execute('SELECT 1')
+    yield from cur.close()
+    assert conn.query_count == 2
+    yield from pool.release(conn)
+    # recycled in background, size is kept
+    assert pool.size == 1
+    yield from wait_pool_tasks(pool, loop)
+    assert conn.closed
+    assert pool.freesize == 1
+    assert conn not in pool._free
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_lifetime(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, max_lifetime=0.05)
+    conn = yield from pool.acquire()
+    yield from asyncio.sleep(0.06, loop=loop)
+    yield from pool.release(conn)
+    yield from wait_pool_tasks(pool, loop)
+    assert conn.closed
+    assert pool.freesize == 1
+
+    # expired free connections are recycled by housekeeping
+    conn = pool._free[0]
+    yield from asyncio.sleep(0.1, loop=loop)
+    yield from wait_pool_tasks(pool, loop)
+    assert conn.closed
+    assert pool.freesize == 1
+    conn2 = yield from pool.acquire()
+    assert not conn2.closed
+    yield from pool.release(conn2)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_idle(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        max_idle=0.05
+    )
+    conn1 = yield from pool.acquire()
+    conn2 = yield from pool.acquire()
+    yield from pool.release(conn1)
+    yield from pool.release(conn2)
+    assert pool.freesize == 2
+    yield from asyncio.sleep(0.1, loop=loop)
+    yield from wait_pool_tasks(pool, loop)
+    # shrink back to minsize, the oldest idle connection goes first
+    assert conn1.closed
+    assert not conn2.closed
+    assert pool.size == 1
+    assert [conn2] == list(pool._free)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_parallel_warmup(loop, pool_maker, db):
+    active = []
+    peak = []
+    connect = aiosqlite3.pool.connect
+
+    @asyncio.coroutine
+    def slow_connect(**kwargs):
+        active.append(None)
+        peak.append(len(active))
+        yield from asyncio.sleep(0.01, loop=loop)
+        try:
+            return (yield from connect(**kwargs))
+        finally:
+            active.pop()
+
+    with mock.patch('aiosqlite3.pool.connect', slow_connect):
+        pool = yield from pool_maker(loop, database=db, minsize=4)
+    assert max(peak) == 4
+    assert pool.freesize == 4
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_parallel_warmup_error(loop, pool_maker, db):
+    connect = aiosqlite3.pool.connect
+    calls = []
+
+    @asyncio.coroutine
+    def flaky_connect(**kwargs):
+        calls.append(None)
+        if len(calls) == 2:
+            raise aiosqlite3.OperationalError('boom')
+        return (yield from connect(**kwargs))
+
+    pool = Pool(db, 3, 3, False, loop)
+    with mock.patch('aiosqlite3.pool.connect', flaky_connect):
+        with pytest.raises(aiosqlite3.OperationalError):
+            with (yield from pool._cond):
+                yield from pool._fill_free_pool(False)
+    assert pool.size == pool.freesize == 2
+    pool.close()
+    yield from pool.wait_closed()
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_background_warmup(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=3,
+        background_warmup=True
+    )
+    assert pool.size == 3
+    assert pool.freesize == 1
+    yield from wait_pool_tasks(pool, loop)
+    assert pool.freesize == 3
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_reset_on_release(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    cur = yield from conn.execute('CREATE TABLE IF NOT EXISTS reset_tbl (id)')
+    yield from cur.close()
+    yield from conn.commit()
+    cur = yield from conn.execute('INSERT INTO reset_tbl VALUES (1)')
+    yield from cur.close()
+    conn.row_factory = sqlite3.Row
+    conn.text_factory = bytes
+    assert conn.in_transaction
+    assert conn.dirty
+
+    yield from pool.release(conn)
+    # still counted as used until the background reset is done
+    assert pool.size == 1
+    assert pool.freesize == 0
+    conn2 = yield from pool.acquire()
+    assert conn2 is conn
+    assert not conn.dirty
+    assert conn.row_factory is None
+    assert conn.text_factory is str
+    cur = yield from conn.execute('SELECT count(*) FROM reset_tbl')
+    assert (0,) == (yield from cur.fetchone())
+    yield from cur.close()
+    yield from pool.release(conn)
+    assert pool.freesize == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_reset_on_release_disabled(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, reset_on_release=False)
+    conn = yield from pool.acquire()
+    conn.row_factory = sqlite3.Row
+    with mock.patch.object(conn, 'reset') as reset:
+        yield from pool.release(conn)
+    assert not reset.called
+    assert pool.freesize == 1
+    conn.row_factory = None
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_ping_on_release_failure(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=1,
+        ping_on_release=True
+    )
+    conn = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0, loop=loop)
+
+    with mock.patch.object(
+            conn,
+            '_reset',
+            side_effect=aiosqlite3.OperationalError('broken')
+    ):
+        yield from pool.release(conn)
+        yield from wait_pool_tasks(pool, loop)
+    assert conn.closed
+    # the waiter gets a fresh connection
+    conn2 = yield from task
+    assert conn2 is not conn
+    assert not conn2.closed
+    yield from pool.release(conn2)
+    yield from wait_pool_tasks(pool, loop)
+    assert pool.freesize == 1
+
+
+@asyncio.coroutine
+def queue_labelled_waiters(pool, loop, labels, order):
+    """
+    按顺序排队等待, 拿到连接后记录 label 并立即释放
+    """
+    @asyncio.coroutine
+    def worker(label, priority):
+        conn = yield from pool.acquire(priority=priority)
+        order.append(label)
+        yield from pool.release(conn)
+
+    tasks = []
+    for label, priority in labels:
+        tasks.append(asyncio.ensure_future(worker(label, priority), loop=loop))
+        yield from asyncio.sleep(0, loop=loop)
+    return tasks
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_strict_priority(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    order = []
+    tasks = yield from queue_labelled_waiters(
+        pool,
+        loop,
+        [('low1', 0), ('high1', 5), ('low2', 0), ('high2', 5)],
+        order
+    )
+    assert pool.waiters == 4
+    yield from pool.release(conn)
+    yield from asyncio.gather(*tasks, loop=loop)
+    assert ['high1', 'high2', 'low1', 'low2'] == order
+    assert set(pool.class_wait_times) == {0, 5}
+    assert pool.class_wait_times[5].count == 2
+    stats = pool.wait_time_percentiles((100,), priority=5)
+    assert stats[100] <= pool.wait_time_percentiles((100,), priority=0)[100]
+    assert pool.wait_time_percentiles((50,), priority=9) == {50: 0.0}
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_weighted_priority(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=1,
+        priority_policy='weighted',
+        priority_weights={1: 2}
+    )
+    conn = yield from pool.acquire()
+    order = []
+    tasks = yield from queue_labelled_waiters(
+        pool,
+        loop,
+        [('L', 0)] * 3 + [('H', 1)] * 3,
+        order
+    )
+    yield from pool.release(conn)
+    yield from asyncio.gather(*tasks, loop=loop)
+    assert list('HLHHLL') == order
+
+
+def test_invalid_priority_policy(loop, db, capsys):
+    with pytest.raises(ValueError):
+        Pool(db, 1, 1, False, loop, priority_policy='random')
+    gc.collect()
+    # __del__ of the half built pool must not fail
+    assert 'Exception ignored' not in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_reserved_capacity(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=0,
+        maxsize=3,
+        reserved={1: 2}
+    )
+    assert pool.reserved == {1: 2}
+    low = yield from pool.acquire()
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    # the other two connections are kept for priority 1
+    assert not task.done()
+    assert pool.waiters == 1
+
+    high1 = yield from pool.acquire(priority=1)
+    high2 = yield from pool.acquire(priority=1)
+    assert pool.size == 3
+    assert not task.done()
+
+    yield from pool.release(low)
+    # a low priority connection may be reused by low priority
+    low2 = yield from task
+    assert low2 is low
+    yield from pool.release(high1)
+    yield from pool.release(high2)
+    # only one connection is left for other priorities
+    task = asyncio.ensure_future(pool.acquire(), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert not task.done()
+    assert pool.freesize == 2
+    yield from pool.release(low2)
+    conn = yield from task
+    assert conn is low2
+    yield from pool.release(conn)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_acquire_fair_across_keys(loop, pool_maker, db):
+    pool = yield from pool_maker(loop, database=db, minsize=1, maxsize=1)
+    conn = yield from pool.acquire()
+    order = []
+
+    @asyncio.coroutine
+    def worker(label, key):
+        conn = yield from pool.acquire(key=key)
+        order.append(label)
+        yield from pool.release(conn)
+
+    tasks = []
+    for label in ('a1', 'a2', 'a3', 'b1', 'b2'):
+        tasks.append(asyncio.ensure_future(worker(label, label[0]), loop=loop))
+        yield from asyncio.sleep(0, loop=loop)
+    yield from pool.release(conn)
+    yield from asyncio.gather(*tasks, loop=loop)
+    assert ['a1', 'b1', 'a2', 'b2', 'a3'] == order
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_per_key_queue(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=0,
+        maxsize=3,
+        max_per_key=1
+    )
+    assert pool.max_per_key == 1
+    a1 = yield from pool.acquire(key='a')
+    task = asyncio.ensure_future(pool.acquire(key='a'), loop=loop)
+    yield from asyncio.sleep(0.01, loop=loop)
+    assert not task.done()
+    # other keys and unkeyed acquires are not blocked
+    b1 = yield from pool.acquire(key='b')
+    conn = yield from pool.acquire()
+    assert pool.size == 3
+    assert pool.quota_stats() == {
+        'a': {'in_use': 1, 'queued': 1, 'rejected': 0},
+        'b': {'in_use': 1, 'queued': 0, 'rejected': 0},
+    }
+
+    yield from pool.release(conn)
+    assert not task.done()
+    assert pool.freesize == 1
+    yield from pool.release(a1)
+    a2 = yield from task
+    assert a2 is a1
+    yield from pool.release(a2)
+    yield from pool.release(b1)
+    assert pool.quota_stats()['a']['in_use'] == 0
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_max_per_key_fail(loop, pool_maker, db):
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        max_per_key=1,
+        quota_policy='fail'
+    )
+    conn = yield from pool.acquire(key='a')
+    with pytest.raises(aiosqlite3.PoolQuotaExceededError):
+        yield from pool.acquire(key='a')
+    assert pool.quota_stats()['a']['rejected'] == 1
+    yield from pool.release(conn)
+    conn = yield from pool.acquire(key='a')
+    yield from pool.release(conn)
+
+
+def test_invalid_quota_policy(loop, db):
+    with pytest.raises(ValueError):
+        Pool(db, 1, 1, False, loop, quota_policy='drop')
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_close_hooks(loop, db):
+    pool = yield from aiosqlite3.create_pool(db, minsize=0, loop=loop)
+    seen = []
+
+    @asyncio.coroutine
+    def hook(conn):
+        seen.append(conn)
+        cur = yield from conn.execute('SELECT 1')
+        yield from cur.close()
+
+    @asyncio.coroutine
+    def failing_hook(conn):
+        raise RuntimeError('boom')
+
+    pool.add_close_hook(failing_hook)
+    pool.add_close_hook(hook)
+    pool.add_close_hook(hook)
+    pool.remove_close_hook(hook)
+    pool.close()
+    yield from pool.wait_closed()
+    # a temporary connection is opened when none is free
+    assert len(seen) == 1
+    assert seen[0].closed
+    assert pool.size == 0
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_pool_counters(loop, db):
+    pool = yield from aiosqlite3.create_pool(
+        db,
+        minsize=1,
+        maxsize=2,
+        max_waiters=0,
+        loop=loop
+    )
+    conn1 = yield from pool.acquire()
+    conn2 = yield from pool.acquire()
+    with pytest.raises(aiosqlite3.PoolOverloadedError):
+        yield from pool.acquire()
+    yield from pool.release(conn1)
+    yield from pool.release(conn2)
+    assert pool.wait_histogram.count == 2
+    # internal checkouts (e.g. the slow query EXPLAIN) are counted as well
+    conn = pool._acquire_free()
+    yield from pool.release(conn)
+    pool.close()
+    yield from pool.wait_closed()
+    assert {
+        'acquires': 3,
+        'acquire_rejected': 1,
+        'releases': 3,
+        'connects': 2,
+        'closes': 2
+    } == pool.counters
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_failed_background_connect_on_close(loop, db):
+    pool = yield from aiosqlite3.create_pool(db, minsize=0, loop=loop)
+    started = asyncio.Event(loop=loop)
+
+    @asyncio.coroutine
+    def failing_connect():
+        started.set()
+        yield from asyncio.sleep(0.01, loop=loop)
+        raise sqlite3.OperationalError('unable to open database file')
+
+    with mock.patch.object(pool, '_connect', failing_connect):
+        assert 1 == pool._grow(1)
+        yield from started.wait()
+        pool.close()
+        # wait_closed must not hang on the failed background connect
+        yield from asyncio.wait_for(pool.wait_closed(), 1, loop=loop)
+    assert pool.closed
+    assert pool.size == 0
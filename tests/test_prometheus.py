@@ -0,0 +1,94 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import aiosqlite3
+from aiosqlite3.events import StatementEvent
+from aiosqlite3.prometheus import render
+
+
+def samples(text):
+    return dict(
+        line.rsplit(' ', 1) for line in text.splitlines()
+        if not line.startswith('#')
+    )
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_pool_collector(loop, pool_maker):
+    pool = yield from pool_maker(
+        loop,
+        database=':memory:',
+        minsize=1,
+        maxsize=1
+    )
+    collector = aiosqlite3.PrometheusCollector(pool, labels={'pool': 'main'})
+    conn = yield from pool.acquire()
+    cur = yield from conn.execute('SELECT 1')
+    yield from cur.fetchall()
+    with pytest.raises(asyncio.TimeoutError):
+        yield from pool.acquire(timeout=0.01)
+
+    text = collector.render()
+    assert '# TYPE aiosqlite3_pool_acquire_wait_seconds histogram' in text
+    values = samples(text)
+    assert values['aiosqlite3_pool_size{pool="main"}'] == '1'
+    assert values['aiosqlite3_pool_in_use{pool="main"}'] == '1'
+    assert values['aiosqlite3_pool_acquires_total{pool="main"}'] == '1'
+    assert values[
+        'aiosqlite3_pool_acquire_timeouts_total{pool="main"}'
+    ] == '1'
+    assert values[
+        'aiosqlite3_pool_connections_opened_total{pool="main"}'
+    ] == '1'
+    assert values[
+        'aiosqlite3_pool_acquire_wait_seconds_bucket{le="+Inf",pool="main"}'
+    ] == '1'
+    assert values[
+        'aiosqlite3_statement_duration_seconds_count{pool="main"}'
+    ] == '1'
+
+    yield from pool.release(conn)
+    collector.close()
+    assert not conn._listeners
+    values = samples(collector.render())
+    assert values['aiosqlite3_pool_releases_total{pool="main"}'] == '1'
+    assert values['aiosqlite3_pool_free{pool="main"}'] == '1'
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_connection_collector(loop, conn):
+    collector = aiosqlite3.PrometheusCollector(conn, namespace='db')
+    event = StatementEvent(conn, 'execute', 'UPDATE t SET a = 1', None)
+    event.error = sqlite3.OperationalError('database is locked')
+    collector._on_statement(event)
+    with pytest.raises(sqlite3.OperationalError):
+        yield from conn.execute('SELECT * FROM missing_tbl')
+
+    text = collector.render()
+    assert 'db_pool_size' not in text
+    values = samples(text)
+    assert values['db_statement_errors_total'] == '2'
+    assert values['db_statement_busy_errors_total'] == '1'
+    assert values['db_statement_duration_seconds_count'] == '2'
+    collector.close()
+
+
+def test_render_merges_collectors():
+
+    class Fixed:
+        def __init__(self, value):
+            self.value = value
+
+        def collect(self):
+            return [('x_total', 'counter', 'X.', [
+                ('', {'name': self.value}, 1)
+            ])]
+
+    text = render([Fixed('a"b'), Fixed('c\\d')])
+    assert 1 == text.count('# TYPE x_total counter')
+    assert 'x_total{name="a\\"b"} 1\n' in text
+    assert 'x_total{name="c\\\\d"} 1\n' in text
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from aiosqlite3 import AdaptivePoolSizer
+from tests.test_pool import wait_pool_tasks
+
+
+def test_invalid_water_marks():
+    with pytest.raises(ValueError):
+        AdaptivePoolSizer(high_water=0.3, low_water=0.5)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_grow_on_high_usage(loop, pool_maker, db):
+    sizer = AdaptivePoolSizer(interval=60, high_water=0.5, step=2)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=4,
+        sizer=sizer
+    )
+    assert sizer.pool is pool
+    conn = yield from pool.acquire()
+    assert sizer.adjust() == 2
+    assert pool.size == 3
+    yield from wait_pool_tasks(pool, loop)
+    assert pool.freesize == 2
+    assert sizer.adjust() == 0
+
+    conn2 = yield from pool.acquire()
+    conn3 = yield from pool.acquire()
+    # capped at maxsize
+    assert sizer.adjust() == 1
+    yield from wait_pool_tasks(pool, loop)
+    assert pool.size == 4
+    assert sizer.adjust() == 0
+    for item in (conn, conn2, conn3):
+        yield from pool.release(item)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_grow_on_slow_wait(loop, pool_maker, db):
+    sizer = AdaptivePoolSizer(interval=60, grow_wait=0.01)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=2,
+        maxsize=4,
+        sizer=sizer
+    )
+    assert sizer.adjust() == 0
+    pool.wait_times.add(0.5)
+    assert sizer.adjust() == 1
+    yield from wait_pool_tasks(pool, loop)
+    # samples are consumed once
+    assert sizer.adjust() == 0
+    assert pool.size == 3
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_shrink_after_quiet_period(loop, pool_maker, db):
+    sizer = AdaptivePoolSizer(interval=60, quiet_period=0.05)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=4,
+        sizer=sizer
+    )
+    conns = []
+    for _ in range(3):
+        conns.append((yield from pool.acquire()))
+    for conn in conns:
+        yield from pool.release(conn)
+    assert pool.freesize == 3
+
+    assert sizer.adjust() == 0
+    assert sizer.adjust() == 0
+    yield from asyncio.sleep(0.06, loop=loop)
+    assert sizer.adjust() == -1
+    yield from wait_pool_tasks(pool, loop)
+    assert conns[0].closed
+    assert pool.size == 2
+
+    # usage between the water marks restarts the quiet period
+    conn = yield from pool.acquire()
+    assert sizer.adjust() == 0
+    yield from pool.release(conn)
+    assert sizer.adjust() == 0
+    assert pool.size == 2
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_sizer_timer(loop, pool_maker, db):
+    sizer = AdaptivePoolSizer(interval=0.01, high_water=0.5)
+    pool = yield from pool_maker(
+        loop,
+        database=db,
+        minsize=1,
+        maxsize=2,
+        sizer=sizer
+    )
+    conn = yield from pool.acquire()
+    yield from asyncio.sleep(0.05, loop=loop)
+    yield from wait_pool_tasks(pool, loop)
+    assert pool.size == 2
+    yield from pool.release(conn)
+    pool.close()
+    assert sizer.pool is None
+    yield from pool.wait_closed()
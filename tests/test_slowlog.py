@@ -0,0 +1,158 @@
+import asyncio
+import os
+
+import pytest
+
+import aiosqlite3
+from aiosqlite3.slowlog import plan_flags
+
+
+def test_fingerprint():
+    fp = aiosqlite3.fingerprint
+    assert 'SELECT * FROM t WHERE id = ? AND name = ?' == fp(
+        "SELECT *  FROM t\n WHERE id = 10 AND name = 'it''s' -- note"
+    )
+    assert 'SELECT a FROM t WHERE id IN (...)' == fp(
+        'SELECT a FROM t WHERE id IN (1, 2, 3)'
+    )
+    assert 'SELECT a FROM t WHERE id IN (...)' == fp(
+        'SELECT a FROM t WHERE id IN (?, ?)'
+    )
+    assert 'INSERT INTO t (a, b) VALUES (?, ?)' == fp(
+        'INSERT INTO t (a, b) VALUES (:a, :b), (1, 2)'
+    )
+    assert 'UPDATE t2 SET v = v + ? WHERE x1 = ?' == fp(
+        'UPDATE t2 SET v = v+1 WHERE x1 = -1.5e3'
+    )
+    # comment markers inside literals are not comments
+    assert 'SELECT * FROM t WHERE url = ? AND id = ?' == fp(
+        "SELECT * FROM t WHERE url = 'http://x--y' AND id = 1"
+    )
+    assert 'SELECT * FROM t WHERE note = ? AND id = ?' == fp(
+        "SELECT * FROM t WHERE note = '--' AND id = 2"
+    )
+    assert 'SELECT * FROM t WHERE note = ? AND id = ?' == fp(
+        "SELECT * FROM t WHERE note = '/* x */' /* c */ AND id = 3"
+    )
+    assert 'SELECT "a--b" FROM t' == fp('SELECT "a--b" FROM t -- c')
+    # a sign is part of the literal only after an operator, ( or ,
+    assert 'SELECT a - ? FROM t' == fp('SELECT a -1 FROM t')
+    assert 'SELECT a - ? FROM t' == fp('SELECT a - 1 FROM t')
+    assert 'SELECT a + ? FROM t' == fp('SELECT a +1 FROM t')
+    assert 'SELECT ?, f(?, ?)' == fp('SELECT -1, f(-2, +3)')
+
+
+def test_plan_flags():
+    assert ['full_scan', 'temp_btree'] == plan_flags([
+        'SCAN t',
+        'USE TEMP B-TREE FOR ORDER BY'
+    ])
+    assert [] == plan_flags(['SEARCH t USING INDEX t_a (a=?)'])
+    assert [] == plan_flags(['SCAN t USING COVERING INDEX t_a'])
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_connection_slow_query_log(loop, make_conn):
+    conn = yield from make_conn(slow_query_threshold=0)
+    slow = conn.slow_query_log
+    assert slow.threshold == 0
+    yield from conn.execute('CREATE TABLE sq_tbl (a, b)')
+    yield from conn.executemany(
+        'INSERT INTO sq_tbl VALUES (?, ?)',
+        [(i, i) for i in range(10)]
+    )
+    cur = yield from conn.execute(
+        'SELECT a FROM sq_tbl WHERE b > ? ORDER BY a',
+        (3,)
+    )
+    assert 6 == len((yield from cur.fetchall()))
+    yield from slow.join()
+
+    queries = {query.fingerprint: query for query in slow.queries}
+    # DDL is logged but never explained
+    create = queries['CREATE TABLE sq_tbl (a, b)']
+    assert create.plan is None
+    select = queries['SELECT a FROM sq_tbl WHERE b > ? ORDER BY a']
+    assert select.rows == 6
+    assert 'full_scan' in select.flags
+    assert 'temp_btree' in select.flags
+    assert select.plan
+    insert = queries['INSERT INTO sq_tbl VALUES (?, ?)']
+    assert insert.plan is not None
+
+    # the same fingerprint is explained once per interval
+    cur = yield from conn.execute(
+        'SELECT a FROM sq_tbl WHERE b > ? ORDER BY a',
+        (5,)
+    )
+    yield from cur.fetchall()
+    yield from slow.join()
+    assert slow.queries[-1].plan is None
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_slow_query_threshold(loop, make_conn):
+    conn = yield from make_conn(slow_query_threshold=60)
+    cur = yield from conn.execute('SELECT 1')
+    yield from cur.fetchall()
+    assert not conn.slow_query_log.queries
+    conn2 = yield from make_conn()
+    assert conn2.slow_query_log is None
+    assert not conn2.instrumented
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_pool_slow_query_log(loop, pool_maker, tmpdir):
+    database = os.path.join(str(tmpdir), 'slow.db')
+    pool = yield from pool_maker(
+        loop,
+        database=database,
+        minsize=2,
+        maxsize=2,
+        slow_query_threshold=0
+    )
+    slow = pool.slow_query_log
+    conn = yield from pool.acquire()
+    assert slow in conn._listeners
+    yield from conn.execute('CREATE TABLE sq_pool (a)')
+    yield from conn.commit()
+    cur = yield from conn.execute('SELECT a FROM sq_pool')
+    yield from cur.fetchall()
+    yield from pool.release(conn)
+    yield from slow.join()
+    assert ['full_scan'] == slow.queries[-1].flags
+
+    # listeners added later reach current and future connections
+    seen = []
+    pool.add_listener(seen.append)
+    conns = []
+    for _ in range(2):
+        conns.append((yield from pool.acquire()))
+    for item in conns:
+        assert seen.append in item._listeners
+        yield from pool.release(item)
+    pool.remove_listener(seen.append)
+    assert all(seen.append not in item._listeners for item in conns)
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_pool_slow_query_no_idle(loop, pool_maker, tmpdir):
+    database = os.path.join(str(tmpdir), 'slow_busy.db')
+    pool = yield from pool_maker(
+        loop,
+        database=database,
+        minsize=1,
+        maxsize=1,
+        slow_query_threshold=0
+    )
+    conn = yield from pool.acquire()
+    cur = yield from conn.execute('SELECT 1')
+    yield from cur.fetchall()
+    # the only connection is busy, the plan is skipped
+    yield from pool.slow_query_log.join()
+    assert pool.slow_query_log.queries[-1].plan is None
+    yield from pool.release(conn)
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import aiosqlite3
+from aiosqlite3 import events
+from aiosqlite3.events import StatementEvent
+
+
+def make_event(sql, duration, rows=0, rowcount=-1, error=None):
+    event = StatementEvent(None, 'execute', sql, None)
+    event.execute_time = duration
+    event.rows = rows
+    event.rowcount = rowcount
+    event.error = error
+    return event
+
+
+def test_statement_stats_aggregate():
+    stats = aiosqlite3.StatementStats()
+    stats(make_event('SELECT * FROM t WHERE id = 1', 0.1, rows=1))
+    stats(make_event('SELECT * FROM t  WHERE id = 2', 0.3, rows=2))
+    stats(make_event(
+        'UPDATE t SET a = 1',
+        0.5,
+        rowcount=4,
+        error=RuntimeError()
+    ))
+    assert 2 == len(stats)
+
+    select = stats.get('SELECT * FROM t WHERE id = 99')
+    assert select.fingerprint == 'SELECT * FROM t WHERE id = ?'
+    assert select.calls == 2
+    assert select.total_time == pytest.approx(0.4)
+    assert select.mean_time == pytest.approx(0.2)
+    assert select.max_time == pytest.approx(0.3)
+    assert select.p95_time == pytest.approx(0.3)
+    assert select.rows == 3
+    assert select.errors == 0
+
+    update = stats.get('UPDATE t SET a = 2')
+    assert update.rows == 4
+    assert update.errors == 1
+    assert stats.get('DELETE FROM t') is None
+
+    assert ['UPDATE t SET a = ?', 'SELECT * FROM t WHERE id = ?'] == [
+        stat.fingerprint for stat in stats.snapshot()
+    ]
+    assert ['SELECT * FROM t WHERE id = ?'] == [
+        stat.fingerprint for stat in stats.top(1, order_by='calls')
+    ]
+
+    stats.reset()
+    assert 0 == len(stats)
+    assert [] == stats.snapshot()
+
+
+def test_statement_stats_bounded():
+    stats = aiosqlite3.StatementStats(max_fingerprints=2)
+    stats(make_event('SELECT a FROM t', 0.1))
+    stats(make_event('SELECT a FROM t', 0.1))
+    stats(make_event('SELECT b FROM t', 0.1))
+    stats(make_event('SELECT c FROM t', 0.1))
+    # the least called fingerprint makes room
+    assert 2 == len(stats)
+    assert stats.evicted == 1
+    assert stats.get('SELECT b FROM t') is None
+    assert stats.get('SELECT a FROM t').calls == 2
+    assert stats.get('SELECT c FROM t').calls == 1
+
+
+def test_statement_stats_comment_markers_in_literals():
+    stats = aiosqlite3.StatementStats()
+    stats(make_event("SELECT * FROM t WHERE note = '--' AND id = 1", 0.1))
+    stats(make_event("SELECT * FROM t WHERE note = '--' OR id = 1", 0.1))
+    stats(make_event("SELECT * FROM t WHERE note = '/*' AND id = 2", 0.1))
+    # the text after the literal still tells the statements apart
+    assert 2 == len(stats)
+    assert stats.get("SELECT * FROM t WHERE note = '--' AND id = 1").calls == 2
+    assert stats.get("SELECT * FROM t WHERE note = '--' OR id = 1").calls == 1
+
+
+@pytest.mark.asyncio
+@asyncio.coroutine
+def test_statement_stats_listener(loop, conn):
+    stats = aiosqlite3.StatementStats()
+    events.add_listener(stats)
+    try:
+        yield from conn.execute('CREATE TABLE st_tbl (a)')
+        yield from conn.executemany(
+            'INSERT INTO st_tbl VALUES (?)',
+            [(1,), (2,), (3,)]
+        )
+        for value in (0, 1):
+            cur = yield from conn.execute(
+                'SELECT a FROM st_tbl WHERE a > %d' % value
+            )
+            yield from cur.fetchall()
+            yield from cur.close()
+    finally:
+        events.remove_listener(stats)
+
+    insert = stats.get('INSERT INTO st_tbl VALUES (?)')
+    assert insert.calls == 1
+    assert insert.rows == 3
+    select = stats.get('SELECT a FROM st_tbl WHERE a > ?')
+    assert select.calls == 2
+    assert select.rows == 5
+    assert select.total_time > 0